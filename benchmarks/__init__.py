@@ -0,0 +1 @@
+"""Offline benchmarks for the scraper's parsing hot paths."""
@@ -0,0 +1,67 @@
+"""
+Contact page parsing benchmark
+CPU time per profile for the old decode plus two BeautifulSoup trees vs the single lxml parse
+
+Usage: python -m benchmarks.bench_contact_parse [--blocks 200] [--rounds 50]
+"""
+
+import argparse
+import html
+import time
+
+from benchmarks.payloads import contact_page
+from src.main import RE_WEBSITES, LinkedInProfileScraper
+
+try:
+    from bs4 import BeautifulSoup  # Only needed to measure the old code path
+except ImportError:
+    BeautifulSoup = None
+
+
+def legacy_parse(contact_html: str):
+    """Previous behaviour: decode, then one html.parser tree for the text and another for the title."""
+    decoded = html.unescape(contact_html).encode('utf-8').decode('unicode_escape')
+    websites = RE_WEBSITES.findall(BeautifulSoup(decoded, 'html.parser').get_text())
+    title_tag = BeautifulSoup(decoded, 'html.parser').find('title')
+    return websites, title_tag.text if title_tag else None
+
+
+def current_parse(scraper: LinkedInProfileScraper):
+    scraper._contact_document = None
+    text, title = scraper._get_contact_document()
+    return RE_WEBSITES.findall(text), title
+
+
+def cpu_ms_per_call(func, rounds: int) -> float:
+    start = time.process_time()
+    for _ in range(rounds):
+        func()
+    return (time.process_time() - start) / rounds * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--blocks', type=int, default=200, help='hidden <code> blocks in the page')
+    parser.add_argument('--rounds', type=int, default=50)
+    args = parser.parse_args()
+
+    scraper = LinkedInProfileScraper('jose-muller', '')
+    scraper._contact_info = contact_page(args.blocks, fullname='Jose Muller')
+    print(f'Contact page: {len(scraper._contact_info) / 1024:.0f} KiB, {args.rounds} rounds')
+
+    current = cpu_ms_per_call(lambda: current_parse(scraper), args.rounds)
+    if BeautifulSoup is None:
+        print(f'lxml single parse:        {current:8.2f} ms/profile')
+        print('Install beautifulsoup4 to measure the previous code path')
+        return
+
+    if legacy_parse(scraper._contact_info) != current_parse(scraper):
+        raise SystemExit('Outputs differ between legacy and current parse')
+    legacy = cpu_ms_per_call(lambda: legacy_parse(scraper._contact_info), args.rounds)
+    print(f'decode + html.parser x2: {legacy:8.2f} ms/profile')
+    print(f'lxml single parse:       {current:8.2f} ms/profile')
+    print(f'Speedup:                  {legacy / current:8.1f}x')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,168 @@
+"""
+Output benchmark
+Writes the same profile records through the dataset writer and the NDJSON and Parquet key-value store
+exporters into throwaway local storage, and checks the exported files round-trip to the records and that
+closing the writer mid-push loses nothing
+
+Usage: python -m benchmarks.bench_export [--records 2000] [--size medium]
+"""
+
+import argparse
+import asyncio
+import io
+import json
+import os
+import sys
+import tempfile
+import time
+
+from benchmarks.payloads import FIXTURE_SIZES, load_fixture
+import pyarrow.parquet as pq
+
+from src.main import LinkedInProfileScraper
+
+
+def build_records(size: str, count: int) -> list:
+    """Success records with a failure every tenth, first included, and some change fields."""
+    fixture = load_fixture(size)
+    scraper = LinkedInProfileScraper('jose-muller', '')
+    scraper._contact_info = fixture['contact']
+    record = scraper._build_profile(fixture['profile'], fixture['cards'])
+    records = []
+    for number in range(count):
+        username = f'user-{number}'
+        if number % 10 == 0:
+            records.append({'username': username, 'scrape_status': 'failed', 'error': f'Error: {username}: 404'})
+        elif number % 10 == 5:
+            records.append(dict(record, username=username, scrape_status='success',
+                                change_type='changed', changed_fields=['headline']))
+        else:
+            records.append(dict(record, username=username, scrape_status='success'))
+    return records
+
+
+def drop_nulls(value):
+    """Parquet fills the fields a record does not have with nulls; drop them to compare."""
+    if isinstance(value, dict):
+        return {key: drop_nulls(item) for key, item in value.items() if item is not None}
+    if isinstance(value, list):
+        return [drop_nulls(item) for item in value]
+    return value
+
+
+def mismatch(message: str) -> None:
+    # The actor context swallows the SystemExit message, so print it first
+    print(message, file=sys.stderr)
+    raise SystemExit(1)
+
+
+async def read_parts(store, exporter) -> list:
+    exported = []
+    for part in range(1, exporter.parts + 1):
+        data = await store.get_value(f'{exporter.prefix}-{part:05d}.{exporter.export_format}')
+        if exporter.export_format == 'parquet':
+            exported.extend(pq.read_table(io.BytesIO(data)).to_pylist())
+        else:
+            text = data.decode('utf-8') if isinstance(data, bytes) else data
+            exported.extend(json.loads(line) for line in text.splitlines())
+    return exported
+
+
+async def check_close_during_push() -> None:
+    """Closing the writer while the periodic flush is pushing, or cancelling a push, must not lose records."""
+    from src.output import DatasetWriter
+
+    class SlowWriter(DatasetWriter):
+        pushed: list
+
+        async def _push(self, batch):
+            await asyncio.sleep(0.2)
+            self.pushed.extend(batch)
+
+    records = [{'username': f'user-{number}'} for number in range(3)]
+    stored = []
+
+    async def on_flushed(keys):
+        stored.extend(keys)
+
+    writer = SlowWriter(flush_interval=0.01, on_flushed=on_flushed)
+    writer.pushed = []
+    writer.start()
+    for record in records:
+        await writer.add(record, key=record['username'])
+    # Let the ticker start pushing
+    await asyncio.sleep(0.05)
+    await writer.close()
+    if writer.pushed != records or stored != [record['username'] for record in records]:
+        raise SystemExit('Closing the writer during a push lost records')
+
+    writer = SlowWriter(flush_interval=60)
+    writer.pushed = []
+    for record in records:
+        await writer.add(record)
+    flush = asyncio.create_task(writer.flush())
+    await asyncio.sleep(0.05)
+    flush.cancel()
+    await asyncio.gather(flush, return_exceptions=True)
+    await writer.close()
+    if writer.pushed != records:
+        raise SystemExit('A cancelled push lost records')
+
+
+async def write_all(writer, records: list) -> float:
+    started = time.perf_counter()
+    writer.start()
+    for record in records:
+        await writer.add(record, key=record['username'])
+    await writer.close()
+    return time.perf_counter() - started
+
+
+async def run(records: list) -> None:
+    from apify import Actor
+    from src.output import DatasetWriter, KeyValueStoreExporter
+
+    async with Actor:
+        dataset_seconds = await write_all(DatasetWriter(), records)
+
+        store = await Actor.open_key_value_store()
+        exporter = KeyValueStoreExporter(store)
+        await exporter.open()
+        export_seconds = await write_all(exporter, records)
+        if await read_parts(store, exporter) != records:
+            mismatch('Exported NDJSON lines differ from the records written')
+
+        # Small parts, so several of them start with a failure record
+        parquet = KeyValueStoreExporter(store, export_format='parquet', prefix='parquet', batch_size=50)
+        await parquet.open()
+        parquet_seconds = await write_all(parquet, records)
+        if drop_nulls(await read_parts(store, parquet)) != drop_nulls(records):
+            mismatch('Exported Parquet rows differ from the records written')
+
+        # Leaving the actor context exits the process, so report from inside it
+        size_kib = sum(len(json.dumps(record, ensure_ascii=False)) for record in records) / 1024
+        print(f'{len(records)} records, {size_kib:.0f} KiB of JSON')
+        print(f'{"dataset push":<14} {dataset_seconds:>7.2f} s  {len(records) / dataset_seconds:>8.0f} records/s')
+        print(f'{"NDJSON export":<14} {export_seconds:>7.2f} s  {len(records) / export_seconds:>8.0f} records/s'
+              f'  ({exporter.parts} part files)')
+        print(f'{"Parquet export":<14} {parquet_seconds:>7.2f} s  {len(records) / parquet_seconds:>8.0f} records/s'
+              f'  ({parquet.parts} part files)')
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--records', type=int, default=2000)
+    parser.add_argument('--size', choices=FIXTURE_SIZES, default='medium')
+    args = parser.parse_args()
+
+    asyncio.run(check_close_during_push())
+    records = build_records(args.size, args.records)
+    with tempfile.TemporaryDirectory() as storage_dir:
+        # Local storage is picked up from the environment when the actor starts
+        os.environ['CRAWLEE_STORAGE_DIR'] = storage_dir
+        os.environ['CRAWLEE_PURGE_ON_START'] = '1'
+        asyncio.run(run(records))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,74 @@
+"""
+Field scanner benchmark
+Checks the anchored field scanners against one regex search per field and times both,
+next to a single combined regex alternation
+
+Usage: python -m benchmarks.bench_fields [--rounds 200]
+"""
+
+import argparse
+import re
+import time
+
+from benchmarks.payloads import FIXTURE_SIZES, load_fixture
+from src.main import CONTACT_FIELDS, PROFILE_FIELDS, FieldScanner, LinkedInProfileScraper
+
+
+def legacy_scan(scanner: FieldScanner, text: str) -> dict:
+    """Previous behaviour: one regex search, or findall, over the whole text per field."""
+    return {
+        name: list(pattern.finditer(text)) if many else pattern.search(text)
+        for name, (_, pattern, many) in scanner.fields.items()
+    }
+
+
+def alternation_scan(scanner: FieldScanner, text: str) -> dict:
+    """One pass with every field in a single alternation, resuming after each match."""
+    combined = re.compile('|'.join(
+        f'(?P<{name}>{pattern.pattern})' for name, (_, pattern, _) in scanner.fields.items()
+    ))
+    found = {}
+    match = combined.search(text)
+    while match:
+        found.setdefault(match.lastgroup, match)
+        match = combined.search(text, match.start() + 1)
+    return found
+
+
+def spans(fields: dict) -> dict:
+    return {
+        name: [m.span() for m in value] if isinstance(value, list) else value and value.span()
+        for name, value in fields.items()
+    }
+
+
+def cpu_us_per_call(func, rounds: int) -> float:
+    start = time.process_time()
+    for _ in range(rounds):
+        func()
+    return (time.process_time() - start) / rounds * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--rounds', type=int, default=200)
+    args = parser.parse_args()
+
+    print(f'{"fixture":<8} {"response":<8} {"KiB":>5}  {"per-field us":>12}  {"scanner us":>10}  {"alternation us":>14}')
+    for size in FIXTURE_SIZES:
+        fixture = load_fixture(size)
+        scraper = LinkedInProfileScraper('jose-muller', '')
+        scraper._contact_info = fixture['contact']
+        texts = (('profile', PROFILE_FIELDS, fixture['profile']), ('contact', CONTACT_FIELDS, scraper._get_decoded_html()))
+
+        for response, scanner, text in texts:
+            if spans(scanner.scan(text)) != spans(legacy_scan(scanner, text)):
+                raise SystemExit(f'Field scanner differs from per-field regexes on the {size} {response} text')
+            before = cpu_us_per_call(lambda: legacy_scan(scanner, text), args.rounds)
+            now = cpu_us_per_call(lambda: scanner.scan(text), args.rounds)
+            combined = cpu_us_per_call(lambda: alternation_scan(scanner, text), max(1, args.rounds // 20))
+            print(f'{size:<8} {response:<8} {len(text) / 1024:>5.0f}  {before:>12.1f}  {now:>10.1f}  {combined:>14.1f}')
+
+
+if __name__ == '__main__':
+    main()
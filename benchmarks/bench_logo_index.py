@@ -0,0 +1,52 @@
+"""
+Company logo index benchmark
+Checks build_logo_index() against the previous per-match regex scan and times both
+
+Usage: python -m benchmarks.bench_logo_index [--rounds 20]
+"""
+
+import argparse
+import re
+import time
+
+from benchmarks.payloads import cards_response
+from src.main import RE_LOGO, build_logo_index
+
+
+def legacy_logo_index(cards_text: str) -> dict:
+    """Previous behaviour: compile and run one full-document regex per logo match."""
+    logos = {}
+    for match in RE_LOGO.finditer(cards_text):
+        company_id = match.group(1)
+        logo_pattern = rf'(https://media\.licdn\.com/dms/image/[^"]*company-logo[^"]*{company_id}[^"]*)'
+        logo_match = re.search(logo_pattern, cards_text)
+        if logo_match:
+            logos[company_id] = logo_match.group(1)
+    return logos
+
+
+def cpu_ms_per_call(func, rounds: int) -> float:
+    start = time.process_time()
+    for _ in range(rounds):
+        func()
+    return (time.process_time() - start) / rounds * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--rounds', type=int, default=20)
+    args = parser.parse_args()
+
+    print(f'{"positions":>9}  {"KiB":>6}  {"logos":>5}  {"before ms":>9}  {"now ms":>7}')
+    for positions in (3, 12, 45, 120):
+        cards_text = cards_response(positions, noise_cards=positions)
+        expected = legacy_logo_index(cards_text)
+        if build_logo_index(cards_text) != expected:
+            raise SystemExit(f'Logo index differs from the previous implementation at {positions} positions')
+        before = cpu_ms_per_call(lambda: legacy_logo_index(cards_text), args.rounds)
+        now = cpu_ms_per_call(lambda: build_logo_index(cards_text), args.rounds)
+        print(f'{positions:>9}  {len(cards_text) / 1024:>6.0f}  {len(expected):>5}  {before:>9.3f}  {now:>7.3f}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,275 @@
+"""
+End-to-end load test
+Starts the local LinkedIn stand-in and scrapes through it at several concurrency levels, either with
+LinkedInProfileScraper in this process or with the whole actor in a child process, and reports
+throughput, latency percentiles and peak memory per level
+
+Usage: python -m benchmarks.load_test [--mode scraper|actor|both] [--profiles 200] [--concurrency 1,4,16]
+       [--latency-ms 50] [--rate-429 0.01] [--size medium]
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from typing import Dict, Iterator, List, Optional
+from urllib.request import urlopen
+
+from benchmarks.payloads import FIXTURE_SIZES
+from src.metrics import METRICS_KEY
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+COOKIES = 'li_at=load-test; JSESSIONID="ajax:0000000000000000000"'
+# High enough that the rate limiter never paces a load test on its own
+UNLIMITED_RATE = 100000.0
+RSS_SAMPLE_SECONDS = 0.02
+
+
+@contextmanager
+def mock_server(args) -> Iterator[str]:
+    """Run the stand-in server in a child process, so it does not share the GIL; yield its URL."""
+    command = [
+        sys.executable, '-m', 'benchmarks.mock_linkedin', '--port', '0',
+        '--size', args.size,
+        '--latency-ms', str(args.latency_ms), '--jitter-ms', str(args.jitter_ms),
+        '--rate-429', str(args.rate_429), '--rate-999', str(args.rate_999), '--rate-5xx', str(args.rate_5xx),
+        '--seed', '1',
+    ]
+    if args.positions is not None:
+        command += ['--positions', str(args.positions)]
+    server = subprocess.Popen(command, cwd=ROOT, stdout=subprocess.PIPE, text=True)
+    try:
+        line = server.stdout.readline()
+        if not line.startswith('Serving on '):
+            raise SystemExit('The mock LinkedIn server did not start')
+        yield line[len('Serving on '):].strip()
+    finally:
+        server.terminate()
+        server.wait()
+
+
+def server_stats(url: str) -> Dict[str, int]:
+    with urlopen(f'{url}/__stats') as response:
+        return json.load(response)
+
+
+def stats_delta(before: Dict[str, int], after: Dict[str, int]) -> Dict[str, int]:
+    """Requests per status served between two snapshots."""
+    statuses: Dict[str, int] = {}
+    for key, count in after.items():
+        status = key.rsplit('_', 1)[1]
+        statuses[status] = statuses.get(status, 0) + count - before.get(key, 0)
+    return statuses
+
+
+def format_statuses(statuses: Dict[str, int]) -> str:
+    return ' '.join(f'{status}:{count}' for status, count in sorted(statuses.items()) if count)
+
+
+class PeakRss(threading.Thread):
+    """Samples this process's resident memory until stopped; Linux only."""
+
+    def __init__(self):
+        super().__init__(daemon=True)
+        self.page_size = os.sysconf('SC_PAGE_SIZE')
+        self.peak = 0
+        self._stop_event = threading.Event()
+
+    def sample(self) -> int:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * self.page_size
+
+    def run(self):
+        while not self._stop_event.is_set():
+            self.peak = max(self.peak, self.sample())
+            self._stop_event.wait(RSS_SAMPLE_SECONDS)
+
+    def stop(self) -> int:
+        self._stop_event.set()
+        self.join()
+        return max(self.peak, self.sample())
+
+
+def percentiles(latencies: List[float]) -> Dict[str, float]:
+    """p50 / p90 / p99 in milliseconds."""
+    if len(latencies) < 2:
+        value = latencies[0] * 1000 if latencies else 0.0
+        return {'p50': value, 'p90': value, 'p99': value}
+    cuts = statistics.quantiles(latencies, n=100, method='inclusive')
+    return {'p50': cuts[49] * 1000, 'p90': cuts[89] * 1000, 'p99': cuts[98] * 1000}
+
+
+def print_row(concurrency: int, profiles: int, failed: int, seconds: float, latency: Dict[str, float],
+              rss_bytes: int, statuses: Dict[str, int]) -> None:
+    print(
+        f'{concurrency:>5} {profiles / seconds:>10.1f} {latency["p50"]:>8.0f} {latency["p90"]:>8.0f} '
+        f'{latency["p99"]:>8.0f} {failed:>6} {rss_bytes / 2 ** 20:>9.1f}  {format_statuses(statuses)}'
+    )
+
+
+def print_header(title: str) -> None:
+    print(title)
+    print(f'{"conc":>5} {"profiles/s":>10} {"p50 ms":>8} {"p90 ms":>8} {"p99 ms":>8} {"failed":>6} '
+          f'{"peak MiB":>9}  responses')
+
+
+# ============================================================================
+# SCRAPER MODE
+# ============================================================================
+
+async def scrape_all(url: str, usernames: List[str], concurrency: int, max_retries: int):
+    from src.main import scrape_profile
+    from src.ratelimit import AdaptiveRateLimiter
+    from src.transport import LinkedInTransport
+
+    # Profiles fetch in worker threads; the default executor would cap them
+    asyncio.get_running_loop().set_default_executor(ThreadPoolExecutor(max_workers=concurrency))
+    transport = LinkedInTransport(
+        COOKIES,
+        pool_size=concurrency * 2,
+        limiter=AdaptiveRateLimiter(rate=UNLIMITED_RATE, max_rate=UNLIMITED_RATE),
+        max_retries=max_retries,
+        base_url=url,
+    )
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies: List[float] = []
+    failed = 0
+
+    async def scrape(username: str) -> None:
+        nonlocal failed
+        async with semaphore:
+            started = time.perf_counter()
+            try:
+                await scrape_profile(username, transport)
+            except Exception:
+                failed += 1
+                return
+            latencies.append(time.perf_counter() - started)
+
+    try:
+        await asyncio.gather(*(scrape(username) for username in usernames))
+    finally:
+        transport.close()
+    return latencies, failed
+
+
+def run_scraper(url: str, args, levels: List[int]) -> None:
+    print_header(f'LinkedInProfileScraper, {args.profiles} profiles per level')
+    for concurrency in levels:
+        usernames = [f'load-{concurrency}-{number}' for number in range(args.profiles)]
+        before = server_stats(url)
+        rss = PeakRss()
+        rss.start()
+        started = time.perf_counter()
+        latencies, failed = asyncio.run(scrape_all(url, usernames, concurrency, args.max_retries))
+        seconds = time.perf_counter() - started
+        peak = rss.stop()
+        statuses = stats_delta(before, server_stats(url))
+        print_row(concurrency, len(latencies), failed, seconds, percentiles(latencies), peak, statuses)
+
+
+# ============================================================================
+# ACTOR MODE
+# ============================================================================
+
+def run_actor_once(url: str, args, concurrency: int) -> Optional[Dict]:
+    """Run the actor on local storage; return its METRICS record and the child's peak memory."""
+    with tempfile.TemporaryDirectory() as storage_dir:
+        store_dir = os.path.join(storage_dir, 'key_value_stores', 'default')
+        os.makedirs(store_dir)
+        actor_input = {
+            'profiles': [f'load-{concurrency}-{number}' for number in range(args.profiles)],
+            'cookies': COOKIES,
+            'maxConcurrency': concurrency,
+            'requestsPerSecond': UNLIMITED_RATE,
+            'maxRequestsPerSecond': UNLIMITED_RATE,
+            'maxRetries': args.max_retries,
+            'parserWorkers': args.parser_workers,
+            'instrumentation': True,
+        }
+        with open(os.path.join(store_dir, 'INPUT.json'), 'w') as f:
+            json.dump(actor_input, f)
+
+        env = dict(
+            os.environ,
+            CRAWLEE_STORAGE_DIR=storage_dir,
+            CRAWLEE_PURGE_ON_START='0',
+            LINKEDIN_BASE_URL=url,
+            PYTHONPATH=ROOT,
+        )
+        child = subprocess.Popen(
+            [sys.executable, '-m', 'src'], cwd=ROOT, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+        )
+        _, status, usage = os.wait4(child.pid, 0)
+        child.returncode = os.waitstatus_to_exitcode(status)
+
+        metrics_path = os.path.join(store_dir, METRICS_KEY)
+        if child.returncode != 0 or not os.path.exists(metrics_path):
+            print(f'{concurrency:>5} actor exited with code {child.returncode}')
+            return None
+        with open(metrics_path) as f:
+            summary = json.load(f)
+        # ru_maxrss is in KiB on Linux
+        summary['peak_rss_bytes'] = usage.ru_maxrss * 1024
+        return summary
+
+
+def run_actor(url: str, args, levels: List[int]) -> None:
+    print_header(f'Actor main(), {args.profiles} profiles per level, {args.parser_workers} parser worker(s)')
+    for concurrency in levels:
+        before = server_stats(url)
+        summary = run_actor_once(url, args, concurrency)
+        if summary is None:
+            continue
+        counters = summary['counters']
+        total = summary['timings_ms'].get('profile_total', {})
+        # The actor's own percentiles are already in milliseconds
+        latency = {key: total.get(key, 0.0) for key in ('p50', 'p90', 'p99')}
+        print_row(
+            concurrency,
+            counters.get('profiles_success', 0),
+            counters.get('profiles_failed', 0),
+            max(summary['elapsed_seconds'], 0.1),
+            latency,
+            summary['peak_rss_bytes'],
+            stats_delta(before, server_stats(url)),
+        )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--mode', choices=('scraper', 'actor', 'both'), default='scraper')
+    parser.add_argument('--profiles', type=int, default=200, help='profiles per concurrency level')
+    parser.add_argument('--concurrency', default='1,4,16', help='comma-separated concurrency levels')
+    parser.add_argument('--size', choices=FIXTURE_SIZES, default='medium', help='stored fixture to serve')
+    parser.add_argument('--positions', type=int, help='generate cards with this many positions instead')
+    parser.add_argument('--latency-ms', type=float, default=50.0)
+    parser.add_argument('--jitter-ms', type=float, default=20.0)
+    parser.add_argument('--rate-429', type=float, default=0.0)
+    parser.add_argument('--rate-999', type=float, default=0.0)
+    parser.add_argument('--rate-5xx', type=float, default=0.0)
+    parser.add_argument('--max-retries', type=int, default=3)
+    parser.add_argument('--parser-workers', type=int, default=0, help='actor mode only')
+    args = parser.parse_args()
+    levels = [int(level) for level in args.concurrency.split(',')]
+
+    with mock_server(args) as url:
+        print(f'Mock LinkedIn at {url}: {args.size if args.positions is None else f"{args.positions} positions"}, '
+              f'{args.latency_ms:.0f}±{args.jitter_ms:.0f} ms, '
+              f'429/999/5xx rates {args.rate_429}/{args.rate_999}/{args.rate_5xx}')
+        if args.mode in ('scraper', 'both'):
+            run_scraper(url, args, levels)
+        if args.mode in ('actor', 'both'):
+            run_actor(url, args, levels)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,170 @@
+"""
+Local LinkedIn stand-in
+Serves the contact-info overlay and the profile and profile cards queries from the synthetic payloads,
+with configurable latency and injected throttling and server errors
+
+Usage: python -m benchmarks.mock_linkedin [--port 8080] [--size medium] [--latency-ms 100] [--rate-429 0.01]
+Point a run at it with LINKEDIN_BASE_URL=http://127.0.0.1:8080; GET /__stats returns request counts.
+"""
+
+import argparse
+import json
+import random
+import threading
+import time
+from collections import Counter
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, Optional
+from urllib.parse import urlparse
+
+from benchmarks.payloads import FIXTURE_SIZES, cards_response, contact_page, load_fixture, profile_response
+
+# Seconds a throttled client is told to wait
+RETRY_AFTER_SECONDS = 1
+
+
+def build_payloads(size: str = 'medium', positions: Optional[int] = None) -> Dict[str, bytes]:
+    """Response bodies per endpoint: a stored fixture, or generated with the given number of positions."""
+    if positions is None:
+        fixture = load_fixture(size)
+    else:
+        fixture = {'contact': contact_page(), 'profile': profile_response(), 'cards': cards_response(positions)}
+    return {endpoint: text.encode('utf-8') for endpoint, text in fixture.items()}
+
+
+class MockLinkedInServer(ThreadingHTTPServer):
+    """Threaded HTTP server answering every profile with the same payloads."""
+
+    daemon_threads = True
+
+    def __init__(
+        self,
+        address,
+        payloads: Dict[str, bytes],
+        latency_ms: float = 0.0,
+        jitter_ms: float = 0.0,
+        error_rates: Optional[Dict[int, float]] = None,
+        seed: Optional[int] = None,
+    ):
+        super().__init__(address, MockLinkedInHandler)
+        self.payloads = payloads
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        # Status code -> share of requests answered with it
+        self.error_rates = {status: rate for status, rate in (error_rates or {}).items() if rate > 0}
+        self.random = random.Random(seed)
+        self.lock = threading.Lock()
+        self.counts: Counter = Counter()
+
+    @property
+    def url(self) -> str:
+        host, port = self.server_address[:2]
+        return f'http://{host}:{port}'
+
+    def delay(self) -> float:
+        with self.lock:
+            jitter = self.random.uniform(-self.jitter_ms, self.jitter_ms) if self.jitter_ms else 0.0
+        return max(0.0, self.latency_ms + jitter) / 1000
+
+    def injected_status(self) -> Optional[int]:
+        with self.lock:
+            roll = self.random.random()
+        for status, rate in self.error_rates.items():
+            if roll < rate:
+                return status
+            roll -= rate
+        return None
+
+    def count(self, endpoint: str, status: int) -> None:
+        with self.lock:
+            self.counts[f'{endpoint}_{status}'] += 1
+
+    def stats(self) -> Dict[str, int]:
+        with self.lock:
+            return dict(sorted(self.counts.items()))
+
+
+class MockLinkedInHandler(BaseHTTPRequestHandler):
+    # Keep-alive, like LinkedIn, so connection pooling is exercised
+    protocol_version = 'HTTP/1.1'
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        if url.path == '/__stats':
+            self._send(200, json.dumps(self.server.stats()).encode('utf-8'), 'application/json')
+            return
+
+        endpoint = self._endpoint(url)
+        if endpoint is None:
+            self._send(404, b'Not found', 'text/plain')
+            return
+
+        time.sleep(self.server.delay())
+        status = self.server.injected_status()
+        self.server.count(endpoint, status or 200)
+        if status is not None:
+            headers = {'retry-after': str(RETRY_AFTER_SECONDS)} if status == 429 else {}
+            self._send(status, b'', 'text/plain', headers)
+            return
+
+        content_type = 'text/html; charset=utf-8' if endpoint == 'contact' else 'application/json'
+        self._send(200, self.server.payloads[endpoint], content_type)
+
+    @staticmethod
+    def _endpoint(url) -> Optional[str]:
+        if url.path.startswith('/in/') and url.path.rstrip('/').endswith('/overlay/contact-info'):
+            return 'contact'
+        if url.path == '/voyager/api/graphql':
+            if 'voyagerIdentityDashProfileCards' in url.query:
+                return 'cards'
+            if 'voyagerIdentityDashProfiles' in url.query:
+                return 'profile'
+        return None
+
+    def _send(self, status: int, body: bytes, content_type: str, headers: Optional[Dict[str, str]] = None) -> None:
+        self.send_response(status)
+        self.send_header('content-type', content_type)
+        self.send_header('content-length', str(len(body)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8080, help='0 picks a free port')
+    parser.add_argument('--size', choices=FIXTURE_SIZES, default='medium', help='stored fixture to serve')
+    parser.add_argument('--positions', type=int, help='generate cards with this many positions instead')
+    parser.add_argument('--latency-ms', type=float, default=0.0)
+    parser.add_argument('--jitter-ms', type=float, default=0.0)
+    parser.add_argument('--rate-429', type=float, default=0.0, help='share of requests answered with 429')
+    parser.add_argument('--rate-999', type=float, default=0.0, help='share of requests answered with 999')
+    parser.add_argument('--rate-5xx', type=float, default=0.0, help='share of requests answered with 503')
+    parser.add_argument('--seed', type=int)
+    args = parser.parse_args()
+
+    server = MockLinkedInServer(
+        (args.host, args.port),
+        build_payloads(args.size, args.positions),
+        latency_ms=args.latency_ms,
+        jitter_ms=args.jitter_ms,
+        error_rates={429: args.rate_429, 999: args.rate_999, 503: args.rate_5xx},
+        seed=args.seed,
+    )
+    # The load test reads the address from this line
+    print(f'Serving on {server.url}', flush=True)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,194 @@
+"""
+Synthetic LinkedIn payloads
+Deterministic contact pages and Voyager responses shaped like the real ones
+
+Regenerate the stored fixtures with: python -m benchmarks.payloads
+"""
+
+import html
+import json
+import random
+from pathlib import Path
+from typing import Dict, List
+
+FIXTURES_DIR = Path(__file__).parent / 'fixtures'
+
+# Stored fixture sets, from a short history to a long one with nested roles
+FIXTURE_SIZES = {
+    'small': {'blocks': 40, 'profile_noise': 20, 'positions': 3, 'nested_every': 0, 'noise_cards': 4},
+    'medium': {'blocks': 150, 'profile_noise': 80, 'positions': 12, 'nested_every': 4, 'noise_cards': 12},
+    'large': {'blocks': 300, 'profile_noise': 200, 'positions': 45, 'nested_every': 3, 'noise_cards': 30},
+}
+
+COMPANIES = ['Acme Corporation', 'Globex', 'Initech', 'Umbrella Labs', 'Hooli', 'Stark Industries',
+             'Wayne Enterprises', 'Soylent', 'Cyberdyne Systems', 'Tyrell Corporation', 'Massive Dynamic']
+TITLES = ['Software Engineer', 'Senior Engineer', 'Engineering Manager', 'Product Manager',
+          'Data Scientist', 'Director of Engineering', 'Consultant', 'Intern']
+EMPLOYMENT_TYPES = ['Full-time', 'Part-time', 'Contract', 'Internship', 'Freelance', 'Self-employed']
+LOCATIONS = ['Seattle, Washington, United States', 'Dhaka, Bangladesh', 'München, Bayern, Germany',
+             'London, England, United Kingdom', 'São Paulo, Brazil']
+MONTHS = ['Jan', 'Feb', 'Mar', 'Apr', 'May', 'Jun', 'Jul', 'Aug', 'Sep', 'Oct', 'Nov', 'Dec']
+
+
+def _compact(obj) -> str:
+    """Serialize like LinkedIn does: no whitespace, non-ASCII escaped."""
+    return json.dumps(obj, separators=(',', ':'))
+
+
+def _logo_url(name: str, company_id: str) -> str:
+    slug = name.lower().replace(' ', '_')
+    return (
+        f'https://media.licdn.com/dms/image/v2/C4E0BAQ{company_id}/company-logo_200_200/'
+        f'company-logo_200_200/{company_id}/{slug}_logo?e=2147483647&v=beta&t={company_id}xyz'
+    )
+
+
+def contact_page(blocks: int = 40, fullname: str = 'José Müller', username: str = 'jose-muller') -> str:
+    """Contact-info overlay HTML with HTML-escaped JSON in hidden <code> blocks."""
+    rng = random.Random(blocks)
+    profile = {
+        'elements': ['urn:li:fsd_profile:ACoAAB' + username.upper().replace('-', '')],
+        'profile': {
+            'displayImageWithFrameReference': None,
+            'a11yText': fullname,
+            'children': [LOCATIONS[2]],
+            'defaultLocalizedName': LOCATIONS[2],
+            'countryISOCode': 'de',
+        },
+        'contact': {'url': f'mailto:{username}@example.com'},
+        'websites': [{'url': f'https://{username}.example.org/blog'}, {'url': 'https://github.com/' + username}],
+        'premium': True,
+    }
+    parts = [
+        '<!DOCTYPE html><html lang="en"><head>',
+        f'<title>{html.escape(fullname)} | LinkedIn</title>',
+        '<style>.artdeco-modal{display:none}</style>',
+        '<script>window.__li = {"tracking": "https://www.linkedin.com/li/track"};</script>',
+        '</head><body>',
+        f'<code style="display: none" id="bpr-guid-0">{html.escape(_compact(profile))}</code>',
+    ]
+    for i in range(1, blocks):
+        filler = {
+            'request': f'/voyager/api/identity/dash/profiles?decorationId={i}',
+            'status': 200,
+            'body': {
+                'entityUrn': f'urn:li:fsd_entity:{rng.randrange(10 ** 9)}',
+                'text': ' '.join(rng.choice(TITLES) for _ in range(40)),
+                'see': 'https://www.linkedin.com/in/' + username,
+            },
+        }
+        parts.append(f'<code style="display: none" id="bpr-guid-{i}">{html.escape(_compact(filler))}</code>')
+    parts.append('<div class="pv-contact-info">Contact Info</div></body></html>')
+    return ''.join(parts)
+
+
+def profile_response(first: str = 'José', last: str = 'Müller', username: str = 'jose-muller', noise: int = 20) -> str:
+    """Normalized Voyager profile query response with filler entities around the profile."""
+    rng = random.Random(noise)
+    fsd = 'ACoAAB' + username.upper().replace('-', '')
+    filler = [
+        {'entityUrn': f'urn:li:fsd_company:{rng.randrange(10 ** 6)}', 'name': rng.choice(COMPANIES),
+         'description': ' '.join(rng.choice(TITLES) for _ in range(50)), 'logo': None, '$type': 'Company'}
+        for _ in range(noise)
+    ]
+    return _compact({
+        'data': {'data': {'identityDashProfilesByMemberIdentity': {'elements': [f'urn:li:fsd_profile:{fsd}']}}},
+        'included': filler[:noise // 2] + [
+            {'entityUrn': f'urn:li:fsd_profile:{fsd}', 'profilePicture': None, 'firstName': first,
+             'lastName': last, 'memorialized': False, 'profileTopCardCustomAction': None,
+             'companyNameOnProfileTopCardShown': True, 'headline': 'Builder of things at Acme',
+             'creator': True, 'verificationData': None, 'publicIdentifier': username},
+            {'entityUrn': f'urn:li:fsd_followingState:{fsd}', 'followerCount': 1532},
+            {'entityUrn': f'urn:li:fsd_connections:{fsd}',
+             'connections': {'paging': {'count': 10, 'start': 0, 'total': 500, 'links': []}}},
+        ] + filler[noise // 2:],
+    })
+
+
+def _entity(title: str, company: str, company_id: str, start: int, end, location: str, work_type: str,
+            employment_type: str) -> Dict:
+    end_text = 'Present' if end is None else f'{MONTHS[end % 12]} {2000 + end // 12}'
+    return {
+        'titleV2': {'text': {'text': title}},
+        'subtitle': {'text': f'{company} · {employment_type}'},
+        'caption': {'text': f'{MONTHS[start % 12]} {2000 + start // 12} - {end_text} · 2 yrs 3 mos'},
+        'metadata': {'text': f'{location} · {work_type}'},
+        'image': {
+            'actionTarget': f'https://www.linkedin.com/company/{company_id}/',
+            'attributes': [{'detailData': {'companyLogo': {'vectorImage': {
+                'rootUrl': _logo_url(company, company_id)}}}}],
+        },
+        'subComponents': None,
+    }
+
+
+def cards_response(positions: int = 5, nested_every: int = 4, noise_cards: int = 6, fsd: str = 'ACoAABJOSEMULLER') -> str:
+    """Normalized Voyager profile cards response with experience, about and filler cards."""
+    rng = random.Random(positions)
+    components: List[Dict] = []
+    month = 24 * 12
+    remaining = positions
+    index = 0
+    while remaining > 0:
+        # Every employer is distinct, as on a long real work history
+        company = f'{COMPANIES[index % len(COMPANIES)]} {index // len(COMPANIES) + 1}'
+        company_id = str(1035 + index * 7919)
+        kwargs = dict(location=rng.choice(LOCATIONS), work_type=rng.choice(['Remote', 'Hybrid', 'On-site']),
+                      employment_type=rng.choice(EMPLOYMENT_TYPES))
+        end = None if index == 0 else month
+        if nested_every and index % nested_every == nested_every - 1 and remaining >= 2:
+            # Several roles at one company are nested under a company-level entity
+            roles = min(3, remaining)
+            parent = _entity(company, '3 yrs 2 mos', company_id, month - 40, end, **kwargs)
+            parent['subComponents'] = {'components': [
+                {'components': {'entityComponent': _entity(rng.choice(TITLES), '', '', month - 10 * (r + 1),
+                                                             month - 10 * r, **kwargs)}}
+                for r in range(roles)
+            ]}
+            components.append({'components': {'entityComponent': parent}})
+            remaining -= roles
+        else:
+            components.append({'components': {'entityComponent': _entity(
+                rng.choice(TITLES), company, company_id, month - 20, end, **kwargs)}})
+            remaining -= 1
+        month -= 24
+        index += 1
+
+    included = [
+        {'entityUrn': f'urn:li:fsd_profileCard:({fsd},ABOUT,en_US)', 'topComponents': [{'components': {
+            'textComponent': {'numInitialLinesToShow': 4, 'text': {
+                'textDirection': 'USER_LOCALE', 'text': 'I build "reliable" systems.\nZürich → Dhaka.',
+                'attributesV2': []}}}}]},
+        {'entityUrn': f'urn:li:fsd_profileCard:({fsd},EXPERIENCE,en_US)', 'topComponents': [
+            {'components': {'fixedListComponent': {'components': components}}}]},
+    ]
+    for i in range(noise_cards):
+        included.append({
+            'entityUrn': f'urn:li:fsd_profileCard:({fsd},SECTION_{i},en_US)',
+            'topComponents': [{'components': {'textComponent': {'text': {
+                'text': ' '.join(rng.choice(TITLES) for _ in range(60))}}}}],
+        })
+    return _compact({'data': {'data': {'identityDashProfileCardsByInitialCards': {
+        '*elements': [c['entityUrn'] for c in included]}}}, 'included': included})
+
+
+def write_fixtures(directory: Path = FIXTURES_DIR) -> None:
+    """Write the contact, profile and cards payload of every fixture size."""
+    directory.mkdir(parents=True, exist_ok=True)
+    for size, spec in FIXTURE_SIZES.items():
+        (directory / f'{size}_contact.html').write_text(contact_page(spec['blocks']), encoding='utf-8')
+        (directory / f'{size}_profile.json').write_text(profile_response(noise=spec['profile_noise']), encoding='utf-8')
+        (directory / f'{size}_cards.json').write_text(
+            cards_response(spec['positions'], spec['nested_every'], spec['noise_cards']), encoding='utf-8')
+
+
+def load_fixture(size: str, directory: Path = FIXTURES_DIR) -> Dict[str, str]:
+    """Read one stored fixture set as raw response texts."""
+    return {
+        part: (directory / f'{size}_{part}.{ext}').read_text(encoding='utf-8')
+        for part, ext in (('contact', 'html'), ('profile', 'json'), ('cards', 'json'))
+    }
+
+
+if __name__ == '__main__':
+    write_fixtures()
@@ -0,0 +1,212 @@
+"""
+Offline parsing benchmark suite
+Times each parsing stage on the stored fixtures and compares against a saved baseline
+
+Usage:
+    python -m benchmarks.run                          # print per-stage time and peak memory
+    python -m benchmarks.run --save baseline.json     # record a baseline
+    python -m benchmarks.run --compare baseline.json  # exit 1 if any stage regressed
+    python -m benchmarks.run --write-expected         # refresh expected parse output
+"""
+
+import argparse
+import json
+import sys
+import time
+import tracemalloc
+from typing import Callable, Dict, List
+
+from benchmarks.payloads import FIXTURE_SIZES, FIXTURES_DIR, load_fixture
+from src.companies import CompanyIndex
+from src.main import FieldPlan, LinkedInProfileScraper, build_logo_index, parse_date, scan_profile_cards
+
+# A stage only counts as regressed when it is slower by more than both of these
+DEFAULT_TOLERANCE = 0.25
+MIN_TIME_DELTA_MS = 0.02
+MIN_PEAK_DELTA_KIB = 4
+
+
+def experience_entities(cards_data: Dict) -> List[Dict]:
+    """Every experience entityComponent in the cards response, nested roles included."""
+    entities = []
+    included = cards_data.get("data", {}).get("included", []) or cards_data.get("included", [])
+    for item in included:
+        urn = item.get("entityUrn", "")
+        if "EXPERIENCE" not in urn or "fsd_profileCard" not in urn:
+            continue
+        for comp in item.get("topComponents", []):
+            fixed_list = comp.get("components", {}).get("fixedListComponent") or {}
+            for list_item in fixed_list.get("components", []):
+                entity = list_item.get("components", {}).get("entityComponent")
+                if not entity:
+                    continue
+                entities.append(entity)
+                for nested in (entity.get("subComponents") or {}).get("components", []):
+                    nested_entity = (nested.get("components") or {}).get("entityComponent")
+                    if nested_entity:
+                        entities.append(nested_entity)
+    return entities
+
+
+def build_stages(fixture: Dict[str, str]) -> Dict[str, Callable[[], object]]:
+    """Bind every parsing stage to one fixture set."""
+    prof_text, cards_text = fixture['profile'], fixture['cards']
+    scraper = LinkedInProfileScraper('jose-muller', '')
+    scraper._contact_info = fixture['contact']
+    # A headline-and-experience extraction: no contact page, no basic info
+    narrow = LinkedInProfileScraper('jose-muller', '', plan=FieldPlan(['headline', 'experience']))
+
+    experience_cards, _, logos = scan_profile_cards(cards_text)
+    entities = experience_entities(json.loads(cards_text))
+    captions = [(entity.get("caption") or {}).get("text", "") for entity in entities]
+
+    def decode():
+        scraper._contact_document = None
+        return scraper._get_contact_document()
+
+    def build_profile():
+        scraper._contact_document = None
+        return scraper._build_profile(prof_text, cards_text)
+
+    def build_profile_narrow():
+        return narrow._build_profile(prof_text, cards_text)
+
+    return {
+        'decode_contact': decode,
+        'extract_basic_info': scraper._extract_basic_info,
+        'profile_fields': lambda: scraper._extract_profile_fields(prof_text),
+        'scan_cards': lambda: scan_profile_cards(cards_text),
+        'logo_index': lambda: build_logo_index(cards_text),
+        'extract_experiences': lambda: scraper._extract_experiences(experience_cards, logos),
+        'parse_experience': lambda: [scraper._parse_experience(entity, logos) for entity in entities],
+        'parse_date': lambda: [parse_date(caption) for caption in captions],
+        'build_profile': build_profile,
+        'build_profile_narrow': build_profile_narrow,
+    }
+
+
+def measure(func: Callable[[], object], min_time: float) -> Dict[str, float]:
+    """Best per-call wall time over several repeats, plus the peak of one traced call."""
+    func()
+    number = 1
+    while True:
+        start = time.perf_counter()
+        for _ in range(number):
+            func()
+        if time.perf_counter() - start >= min_time / 5:
+            break
+        number *= 2
+
+    best = float('inf')
+    for _ in range(5):
+        start = time.perf_counter()
+        for _ in range(number):
+            func()
+        best = min(best, (time.perf_counter() - start) / number)
+
+    tracemalloc.start()
+    func()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return {'ms': round(best * 1000, 4), 'peak_kib': round(peak / 1024, 1)}
+
+
+def run_suite(sizes: List[str], min_time: float) -> Dict[str, Dict[str, Dict[str, float]]]:
+    results = {}
+    for size in sizes:
+        stages = build_stages(load_fixture(size))
+        results[size] = {name: measure(func, min_time) for name, func in stages.items()}
+    return results
+
+
+def check_expected(sizes: List[str], write: bool) -> None:
+    """Make sure the benchmarked code still produces the stored profile records."""
+    for size in sizes:
+        path = FIXTURES_DIR / f'{size}_expected.json'
+        fixture = load_fixture(size)
+        scraper = LinkedInProfileScraper('jose-muller', '')
+        scraper._contact_info = fixture['contact']
+        record = scraper._build_profile(fixture['profile'], fixture['cards'])
+        if write:
+            path.write_text(json.dumps(record, indent=2, ensure_ascii=False) + '\n', encoding='utf-8')
+        elif json.loads(path.read_text(encoding='utf-8')) != record:
+            raise SystemExit(f'Parse output for the {size} fixture differs from {path.name}')
+
+
+def check_company_index(sizes: List[str]) -> None:
+    """Inline company output must leave the records as parsed, logos or not."""
+    for size in sizes:
+        record = json.loads((FIXTURES_DIR / f'{size}_expected.json').read_text(encoding='utf-8'))
+        experiences = record.get('experience') or []
+        # The fixtures show a logo for every company; real profiles often do not
+        without_logos = [{key: value for key, value in exp.items() if key != 'company_logo_url'} for exp in experiences]
+        for expected in (experiences, without_logos):
+            resolved = [dict(exp) for exp in expected]
+            CompanyIndex(None).resolve(resolved)
+            if resolved != expected:
+                raise SystemExit(f'The company index changed the experiences of the {size} fixture')
+
+
+def compare(results: Dict, baseline: Dict, tolerance: float) -> List[str]:
+    """List every stage that got slower or hungrier than the baseline allows."""
+    regressions = []
+    for size, stages in results.items():
+        for name, current in stages.items():
+            base = baseline.get(size, {}).get(name)
+            if not base:
+                continue
+            for metric, slack in (('ms', MIN_TIME_DELTA_MS), ('peak_kib', MIN_PEAK_DELTA_KIB)):
+                if current[metric] > base[metric] * (1 + tolerance) and current[metric] - base[metric] > slack:
+                    regressions.append(
+                        f'{size}/{name}: {metric} {base[metric]} -> {current[metric]} '
+                        f'(+{(current[metric] / base[metric] - 1) * 100:.0f}%)'
+                    )
+    return regressions
+
+
+def print_table(results: Dict, baseline: Dict) -> None:
+    print(f'{"fixture":<8} {"stage":<20} {"ms":>9} {"peak KiB":>9} {"vs base":>8}')
+    for size, stages in results.items():
+        for name, current in stages.items():
+            base = baseline.get(size, {}).get(name)
+            delta = f'{(current["ms"] / base["ms"] - 1) * 100:+.0f}%' if base and base['ms'] else ''
+            print(f'{size:<8} {name:<20} {current["ms"]:>9.3f} {current["peak_kib"]:>9.1f} {delta:>8}')
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--sizes', nargs='+', choices=list(FIXTURE_SIZES), default=list(FIXTURE_SIZES))
+    parser.add_argument('--min-time', type=float, default=0.2, help='seconds spent timing each stage')
+    parser.add_argument('--save', metavar='PATH', help='write the results as a baseline')
+    parser.add_argument('--compare', metavar='PATH', help='fail if any stage regressed against this baseline')
+    parser.add_argument('--tolerance', type=float, default=DEFAULT_TOLERANCE, help='allowed slowdown, 0.25 = 25%%')
+    parser.add_argument('--write-expected', action='store_true', help='store the current parse output as expected')
+    args = parser.parse_args()
+
+    check_expected(args.sizes, args.write_expected)
+    check_company_index(args.sizes)
+    results = run_suite(args.sizes, args.min_time)
+
+    baseline = {}
+    if args.compare:
+        with open(args.compare, encoding='utf-8') as f:
+            baseline = json.load(f)
+    print_table(results, baseline)
+
+    if args.save:
+        with open(args.save, 'w', encoding='utf-8') as f:
+            json.dump(results, f, indent=2)
+        print(f'Baseline saved to {args.save}')
+
+    if args.compare:
+        regressions = compare(results, baseline, args.tolerance)
+        if regressions:
+            print(f'\n{len(regressions)} REGRESSION(S) against {args.compare}:', file=sys.stderr)
+            for line in regressions:
+                print(f'  {line}', file=sys.stderr)
+            sys.exit(1)
+        print(f'\nNo regressions against {args.compare}')
+
+
+if __name__ == '__main__':
+    main()
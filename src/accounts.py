@@ -0,0 +1,145 @@
+"""
+Account pool
+Spreads profiles across several LinkedIn cookie identities and tracks their health
+"""
+
+import asyncio
+import time
+from typing import Dict, List, Optional
+
+from src.ratelimit import ThrottledError
+from src.transport import LinkedInTransport
+
+# Cooldown after an account is throttled, doubled on every consecutive throttle
+COOLDOWN_BASE = 60.0
+COOLDOWN_CAP = 3600.0
+
+# Weight of the latest profile in the latency moving average
+LATENCY_ALPHA = 0.2
+
+
+def account_error(error: Exception) -> Optional[str]:
+    """Name the account-level problem behind a scrape error, or None if it is profile-specific."""
+    if isinstance(error, ThrottledError):
+        return error.reason
+    # HTTP errors from both requests and httpx carry the response
+    response = getattr(error, 'response', None)
+    if response is not None and response.status_code == 401:
+        return 'logged_out'
+    return None
+
+
+class Account:
+    """One cookie identity with its own transport, rate limiter and health stats."""
+
+    def __init__(self, name: str, transport: LinkedInTransport, max_in_flight: int):
+        self.name = name
+        self.transport = transport
+        self.max_in_flight = max_in_flight
+        self.in_flight = 0
+        self.succeeded = 0
+        self.failed = 0
+        self.throttled = 0
+        self.latency: Optional[float] = None
+        self.cooling_until = 0.0
+        self.retired_reason: Optional[str] = None
+        self._consecutive_throttles = 0
+
+    def available(self, now: float) -> bool:
+        return (
+            self.retired_reason is None
+            and now >= self.cooling_until
+            and self.in_flight < self.max_in_flight
+        )
+
+    def status(self, now: float) -> str:
+        if self.retired_reason:
+            return f'retired ({self.retired_reason})'
+        if now < self.cooling_until:
+            return f'cooling down ({self.cooling_until - now:.0f}s left)'
+        return 'active'
+
+
+class AccountPool:
+    """Hands each profile to the least loaded, fastest healthy account.
+
+    Throttled accounts cool down with exponential backoff, logged-out
+    accounts are retired for the rest of the run.
+    """
+
+    def __init__(self, accounts: List[Account]):
+        self.accounts = accounts
+        self._changed = asyncio.Condition()
+
+    async def acquire(self) -> Optional[Account]:
+        """Wait for an account with spare capacity; None once every account is retired."""
+        async with self._changed:
+            while True:
+                now = time.monotonic()
+                candidates = [account for account in self.accounts if account.available(now)]
+                if candidates:
+                    account = min(
+                        candidates,
+                        key=lambda a: (a.in_flight / a.max_in_flight, a.latency or 0.0),
+                    )
+                    account.in_flight += 1
+                    return account
+
+                active = [account for account in self.accounts if account.retired_reason is None]
+                if not active:
+                    return None
+                # Wake up when a cooldown ends, or earlier when an account is released
+                cooling = [a.cooling_until - now for a in active if a.cooling_until > now]
+                try:
+                    await asyncio.wait_for(self._changed.wait(), timeout=min(cooling) if cooling else None)
+                except asyncio.TimeoutError:
+                    pass
+
+    async def release(self, account: Account, elapsed: float, error: Optional[Exception] = None) -> Optional[str]:
+        """Record a finished profile; return the account-level problem it revealed, if any."""
+        problem = account_error(error) if error is not None else None
+        async with self._changed:
+            account.in_flight -= 1
+            account.latency = elapsed if account.latency is None else (
+                LATENCY_ALPHA * elapsed + (1 - LATENCY_ALPHA) * account.latency
+            )
+
+            if error is None:
+                account.succeeded += 1
+                account._consecutive_throttles = 0
+            elif problem == 'rate_limited':
+                account.throttled += 1
+                cooldown = min(COOLDOWN_CAP, COOLDOWN_BASE * 2 ** account._consecutive_throttles)
+                account.cooling_until = time.monotonic() + max(cooldown, error.retry_after or 0)
+                account._consecutive_throttles += 1
+            elif problem is not None:
+                account.retired_reason = problem
+            else:
+                account.failed += 1
+
+            self._changed.notify_all()
+        return problem
+
+    @property
+    def size(self) -> int:
+        return len(self.accounts)
+
+    def stats(self) -> List[Dict]:
+        """Per-account health and throughput for the end-of-run report."""
+        now = time.monotonic()
+        return [
+            {
+                'account': account.name,
+                'status': account.status(now),
+                'succeeded': account.succeeded,
+                'failed': account.failed,
+                'throttled': account.throttled,
+                'avg_profile_seconds': round(account.latency, 2) if account.latency is not None else None,
+                **account.transport.stats(),
+            }
+            for account in self.accounts
+        ]
+
+    def close(self) -> None:
+        for account in self.accounts:
+            account.transport.close()
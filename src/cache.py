@@ -0,0 +1,280 @@
+"""
+Persistent response cache
+Keeps LinkedIn responses across runs with a TTL, size-bounded LRU eviction and revalidation
+"""
+
+import asyncio
+import hashlib
+import json
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+from apify import Actor
+
+INDEX_KEY = 'INDEX'
+
+# Defaults used when the input does not set them
+DEFAULT_CACHE_TTL_HOURS = 24
+DEFAULT_CACHE_MAX_SIZE_MB = 512
+DEFAULT_CACHE_STORE_NAME = 'linkedin-response-cache'
+DEFAULT_CACHE_DIRECTORY = 'storage/response-cache'
+
+
+# ============================================================================
+# STORAGE BACKENDS
+# ============================================================================
+
+class DiskCacheBackend:
+    """Cache records stored as JSON files in a local directory."""
+
+    def __init__(self, directory: str):
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+
+    def get(self, key: str) -> Optional[Dict]:
+        path = self.directory / f'{key}.json'
+        if not path.exists():
+            return None
+        return json.loads(path.read_text(encoding='utf-8'))
+
+    def set(self, key: str, value: Dict) -> None:
+        # Write then rename so a crash never leaves a half-written record
+        path = self.directory / f'{key}.json'
+        tmp_path = path.with_suffix('.tmp')
+        tmp_path.write_text(json.dumps(value, ensure_ascii=False), encoding='utf-8')
+        tmp_path.replace(path)
+
+    def delete(self, key: str) -> None:
+        (self.directory / f'{key}.json').unlink(missing_ok=True)
+
+    def keys(self) -> List[Tuple[str, int, float]]:
+        """Every stored key with its size and modification time."""
+        entries = []
+        for path in self.directory.glob('*.json'):
+            stat = path.stat()
+            entries.append((path.stem, stat.st_size, stat.st_mtime))
+        return entries
+
+
+class KeyValueStoreCacheBackend:
+    """Cache records stored in a named Apify key-value store.
+
+    Scrapers run in worker threads, so every call is handed over to the
+    event loop that owns the store and waited on.
+    """
+
+    def __init__(self, store, loop: asyncio.AbstractEventLoop):
+        self.store = store
+        self.loop = loop
+
+    def _run(self, coro):
+        return asyncio.run_coroutine_threadsafe(coro, self.loop).result()
+
+    def get(self, key: str) -> Optional[Dict]:
+        return self._run(self.store.get_value(key))
+
+    def set(self, key: str, value: Dict) -> None:
+        self._run(self.store.set_value(key, value))
+
+    def delete(self, key: str) -> None:
+        self._run(self.store.delete_value(key))
+
+    def keys(self) -> List[Tuple[str, int, float]]:
+        """Every stored key with its size; the store keeps no modification time."""
+        async def collect():
+            return [(record.key, record.size, 0.0) async for record in self.store.iterate_keys()]
+
+        return self._run(collect())
+
+
+# ============================================================================
+# RESPONSE CACHE
+# ============================================================================
+
+class ResponseCache:
+    """Cross-run cache of response bodies keyed by endpoint and profile identifier.
+
+    Entries younger than the TTL are served without a request. Older entries
+    that carry an ETag or Last-Modified validator are revalidated with a
+    conditional request; the rest are fetched again. When the cache grows
+    past its size limit the least recently used entries are evicted.
+    """
+
+    def __init__(self, backend, ttl_seconds: float, max_bytes: int):
+        self.backend = backend
+        self.ttl_seconds = ttl_seconds
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        # key -> [stored_at, size], least recently used first
+        self._index: 'OrderedDict[str, list]' = OrderedDict()
+        self._size = 0
+        self.hits = 0
+        self.revalidated = 0
+        self.misses = 0
+        self.evicted = 0
+        self.errors = 0
+
+    @staticmethod
+    def make_key(endpoint: str, identifier: str) -> str:
+        """Storage-safe key for an endpoint and a username or FSD profile ID."""
+        return f'{endpoint}-{hashlib.sha1(identifier.encode("utf-8")).hexdigest()}'
+
+    def open(self) -> None:
+        """Load the index saved by an earlier run and adopt entries it does not know."""
+        try:
+            saved = self.backend.get(INDEX_KEY) or {}
+        except Exception as e:
+            Actor.log.warning(f'Response cache index could not be loaded: {e}')
+            saved = {}
+        index = OrderedDict((key, list(meta)) for key, meta in saved.items())
+
+        # A run that crashed stored entries after its last index save; they go
+        # first in line for eviction, and without a stored time count as stale
+        try:
+            stored = self.backend.keys()
+        except Exception as e:
+            Actor.log.warning(f'Response cache entries could not be listed: {e}')
+            stored = []
+        orphans = sorted(
+            (stored_at, key, size) for key, size, stored_at in stored
+            if size and key != INDEX_KEY and key not in index
+        )
+        self._index = OrderedDict([(key, [stored_at, size]) for stored_at, key, size in orphans])
+        self._index.update(index)
+        self._size = sum(meta[1] for meta in self._index.values())
+
+    def save(self) -> None:
+        """Persist the index for the next run."""
+        with self._lock:
+            index = dict(self._index)
+        try:
+            self.backend.set(INDEX_KEY, index)
+        except Exception as e:
+            Actor.log.warning(f'Response cache index could not be saved: {e}')
+
+    def close(self) -> None:
+        self.save()
+
+    def lookup(self, key: str) -> Optional[Dict]:
+        """Return the cached entry, marked with whether it is still fresh."""
+        with self._lock:
+            meta = self._index.get(key)
+            if meta is None:
+                self.misses += 1
+                return None
+            self._index.move_to_end(key)
+        try:
+            entry = self.backend.get(key)
+        except Exception:
+            entry = None
+            with self._lock:
+                self.errors += 1
+        if entry is None:
+            with self._lock:
+                self._forget(key)
+                self.misses += 1
+            return None
+
+        entry['fresh'] = time.time() - meta[0] < self.ttl_seconds
+        if entry['fresh']:
+            with self._lock:
+                self.hits += 1
+        elif not (entry.get('etag') or entry.get('last_modified')):
+            # Stale and cannot be revalidated
+            with self._lock:
+                self.misses += 1
+            return None
+        return entry
+
+    def validators(self, entry: Optional[Dict]) -> Dict[str, str]:
+        """Conditional request headers for a stale entry."""
+        headers = {}
+        if entry and entry.get('etag'):
+            headers['if-none-match'] = entry['etag']
+        if entry and entry.get('last_modified'):
+            headers['if-modified-since'] = entry['last_modified']
+        return headers
+
+    def mark_revalidated(self, key: str) -> None:
+        """The server answered 304: the stale entry is fresh again."""
+        with self._lock:
+            if key in self._index:
+                self._index[key][0] = time.time()
+            self.revalidated += 1
+
+    def mark_missed(self) -> None:
+        """A stale entry had to be fetched again in full."""
+        with self._lock:
+            self.misses += 1
+
+    def store(self, key: str, text: str, etag: Optional[str] = None, last_modified: Optional[str] = None) -> None:
+        """Save a response body and evict old entries past the size limit."""
+        size = len(text)
+        try:
+            self.backend.set(key, {'text': text, 'etag': etag, 'last_modified': last_modified})
+        except Exception:
+            with self._lock:
+                self.errors += 1
+            return
+
+        with self._lock:
+            self._forget(key)
+            self._index[key] = [time.time(), size]
+            self._size += size
+            victims = []
+            while self._size > self.max_bytes and len(self._index) > 1:
+                victim, _ = next(iter(self._index.items()))
+                self._forget(victim)
+                victims.append(victim)
+            self.evicted += len(victims)
+
+        for victim in victims:
+            try:
+                self.backend.delete(victim)
+            except Exception:
+                with self._lock:
+                    self.errors += 1
+
+    def _forget(self, key: str) -> None:
+        meta = self._index.pop(key, None)
+        if meta:
+            self._size -= meta[1]
+
+    def stats(self) -> Dict:
+        """Hit and miss counters for the run."""
+        return {
+            'hits': self.hits,
+            'revalidated': self.revalidated,
+            'misses': self.misses,
+            'evicted': self.evicted,
+            'errors': self.errors,
+            'entries': len(self._index),
+            'size_mb': round(self._size / 1024 / 1024, 1),
+        }
+
+
+async def open_response_cache(actor_input: Dict) -> Optional[ResponseCache]:
+    """Build the response cache selected by the actor input, or None when it is off."""
+    mode = actor_input.get('responseCache') or 'off'
+    if mode == 'off':
+        return None
+
+    ttl_hours = actor_input.get('cacheTtlHours')
+    ttl_hours = DEFAULT_CACHE_TTL_HOURS if ttl_hours is None else float(ttl_hours)
+    max_bytes = int(float(actor_input.get('cacheMaxSizeMb') or DEFAULT_CACHE_MAX_SIZE_MB) * 1024 * 1024)
+
+    if mode == 'disk':
+        backend = DiskCacheBackend(actor_input.get('cacheDirectory') or DEFAULT_CACHE_DIRECTORY)
+    elif mode == 'keyValueStore':
+        # A named store outlives the run, the default one does not
+        store = await Actor.open_key_value_store(name=actor_input.get('cacheStoreName') or DEFAULT_CACHE_STORE_NAME)
+        backend = KeyValueStoreCacheBackend(store, asyncio.get_running_loop())
+    else:
+        raise ValueError(f"Unknown responseCache {mode!r}, expected 'off', 'keyValueStore' or 'disk'")
+
+    cache = ResponseCache(backend, ttl_hours * 3600, max_bytes)
+    await asyncio.to_thread(cache.open)
+    return cache
@@ -0,0 +1,107 @@
+"""
+Run checkpoint
+Tracks the input position of the run in its key-value store so a migrated or restarted run resumes
+"""
+
+from datetime import datetime
+from typing import Dict, Iterable, List, Optional, Set
+
+from apify import Actor
+
+CHECKPOINT_KEY = 'CHECKPOINT'
+
+
+class RunCheckpoint:
+    """Input position and unfinished profiles of the run, kept in its default key-value store.
+
+    A profile is done once its record is stored in the dataset, or once it
+    is known that no record will be written for it. Profiles of the inline
+    list, dataset and key-value store record are tracked by input index:
+    everything up to ``read`` is done except the indexes still
+    ``in_flight``. Profiles of the request queue are marked handled in the
+    queue once done; the keys of those read but not done are kept in
+    ``requests``. Only the unfinished profiles are stored, so the
+    checkpoint stays small however long the input is. They are scraped
+    again on resume.
+    """
+
+    def __init__(self, store, request_queue=None):
+        self.store = store
+        self.request_queue = request_queue
+        self.read = 0
+        self.in_flight: Set[int] = set()
+        self.requests: Set[str] = set()
+        # Queue requests of this run by input index, until they are handled
+        self._queued: Dict[int, object] = {}
+        self.interrupted_requests: List[object] = []
+        self.interrupted = 0
+        self._dirty = False
+
+    async def load(self) -> None:
+        """Pick up the progress saved before the run was restarted."""
+        saved = await self.store.get_value(CHECKPOINT_KEY) or {}
+        self.read = saved.get('read') or 0
+        self.in_flight = set(saved.get('in_flight') or ())
+        # A queue does not hand out a request again while it is in progress, so
+        # the interrupted ones are looked up; those stored meanwhile are handled
+        self.interrupted_requests = []
+        for unique_key in saved.get('requests') or ():
+            request = await self.request_queue.get_request(unique_key) if self.request_queue else None
+            if request is not None and request.handled_at is None:
+                self.interrupted_requests.append(request)
+        self.requests = {request.unique_key for request in self.interrupted_requests}
+        self.interrupted = len(self.in_flight) + len(self.requests)
+
+    async def save(self) -> None:
+        """Persist the progress if it changed since the last save."""
+        if not self._dirty:
+            return
+        # Cleared before the await so changes made meanwhile are saved next time
+        self._dirty = False
+        try:
+            await self.store.set_value(CHECKPOINT_KEY, self.snapshot())
+        except Exception:
+            self._dirty = True
+            raise
+
+    def snapshot(self) -> Dict:
+        return {
+            'read': self.read,
+            'in_flight': sorted(self.in_flight),
+            'requests': sorted(self.requests),
+            'updated_at': datetime.utcnow().isoformat(),
+        }
+
+    def is_completed(self, idx: int) -> bool:
+        """Whether the profile at this index of the replayable input is done."""
+        return idx <= self.read and idx not in self.in_flight
+
+    def start(self, idx: int, request: Optional[object] = None) -> None:
+        if request is None:
+            self.in_flight.add(idx)
+            self.read = max(self.read, idx)
+        else:
+            self._queued[idx] = request
+            self.requests.add(request.unique_key)
+        self._dirty = True
+
+    async def complete(self, indexes: Iterable[int]) -> None:
+        """Mark profiles as done; called once their records are stored."""
+        for idx in indexes:
+            request = self._queued.pop(idx, None)
+            if request is None:
+                self.in_flight.discard(idx)
+                continue
+            try:
+                await self.request_queue.mark_request_as_handled(request)
+            except Exception as e:
+                Actor.log.warning(f'Request {request.unique_key} could not be marked handled: {e}')
+            self.requests.discard(request.unique_key)
+        self._dirty = True
+
+
+async def open_checkpoint(request_queue=None) -> RunCheckpoint:
+    """Load the checkpoint of this run from its default key-value store."""
+    checkpoint = RunCheckpoint(await Actor.open_key_value_store(), request_queue)
+    await checkpoint.load()
+    return checkpoint
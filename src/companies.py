@@ -0,0 +1,132 @@
+"""
+Company index
+Interns the companies of a run's experiences and feeds the normalized company table
+"""
+
+import sys
+from typing import Dict, List, Optional, Set
+
+from apify import Actor
+
+COMPANIES_KEY = 'COMPANIES'
+# Run-scoped dataset the normalized company table goes to when no name is given
+COMPANIES_DATASET_ALIAS = 'companies'
+
+# Experience fields that describe the company rather than the position
+COMPANY_FIELDS = (
+    ('name', 'company'),
+    ('linkedin_url', 'company_linkedin_url'),
+    ('logo_url', 'company_logo_url'),
+)
+
+
+class CompanyIndex:
+    """One entity per company ID, shared by every experience of the run.
+
+    Experiences of the same employer point at the entity's strings instead
+    of carrying copies of their own. In normalized mode the URL and logo
+    are dropped from experiences, which keep ``company_id`` as the
+    reference, and each company is returned once, on first sight, to be
+    written to the company table.
+
+    The index lives in a key-value store: the run's default one, so a
+    migrated run does not write its companies twice, or a named one that
+    later runs pick up. Companies loaded from it count as written when the
+    company table they went to is still there (``loaded_written``).
+    """
+
+    def __init__(self, store, normalized: bool = False, loaded_written: bool = True):
+        self.store = store
+        self.normalized = normalized
+        self.loaded_written = loaded_written
+        self._companies: Dict[str, Dict] = {}
+        self._written: Set[str] = set()
+        self._dirty = False
+        self.new = 0
+        self.reused = 0
+        self.written = 0
+
+    async def load(self) -> None:
+        saved = await self.store.get_value(COMPANIES_KEY) or {}
+        self._companies = {sys.intern(company_id): company for company_id, company in saved.items()}
+        if self.loaded_written:
+            self._written = set(self._companies)
+
+    async def save(self) -> None:
+        """Persist the index if it changed since the last save."""
+        if not self._dirty:
+            return
+        self._dirty = False
+        try:
+            await self.store.set_value(COMPANIES_KEY, self._companies)
+        except Exception:
+            self._dirty = True
+            raise
+
+    def resolve(self, experiences: List[Dict]) -> List[Dict]:
+        """Point experiences at the indexed companies; return the companies seen for the first time."""
+        first_seen = []
+        for exp in experiences:
+            company_id = exp.get('company_id')
+            if not company_id:
+                continue
+
+            company = self._companies.get(company_id)
+            if company is None:
+                company_id = sys.intern(company_id)
+                company = {'company_id': company_id}
+                company.update((field, exp[key]) for field, key in COMPANY_FIELDS if exp.get(key))
+                self._companies[company_id] = company
+                self._dirty = True
+                self.new += 1
+            else:
+                self.reused += 1
+                # Fill in what the first profile did not show, such as a missing logo
+                for field, key in COMPANY_FIELDS:
+                    if field not in company and exp.get(key):
+                        company[field] = exp[key]
+                        self._dirty = True
+
+            if self.normalized and company_id not in self._written:
+                self._written.add(company['company_id'])
+                self.written += 1
+                first_seen.append(company)
+
+            exp['company_id'] = company['company_id']
+            if self.normalized:
+                exp.pop('company_linkedin_url', None)
+                exp.pop('company_logo_url', None)
+            else:
+                for field, key in COMPANY_FIELDS[1:]:
+                    if key in exp and field in company and exp[key] == company[field]:
+                        exp[key] = company[field]
+        return first_seen
+
+    def stats(self) -> Dict:
+        return {'companies': len(self._companies), 'new': self.new, 'reused': self.reused, 'written': self.written}
+
+
+async def open_company_index(actor_input: Dict) -> Optional[CompanyIndex]:
+    """Build the company index when normalized output or a persistent index is asked for, or return None."""
+    normalized = actor_input.get('companyOutput') == 'normalized'
+    store_name = actor_input.get('companyIndexStoreName')
+    if not normalized and not store_name:
+        return None
+
+    store = await Actor.open_key_value_store(name=store_name) if store_name else await Actor.open_key_value_store()
+    # A run-scoped table only holds the companies of this run
+    index = CompanyIndex(
+        store,
+        normalized=normalized,
+        loaded_written=not store_name or bool(actor_input.get('companiesDatasetName')),
+    )
+    await index.load()
+    return index
+
+
+async def open_companies_dataset(actor_input: Dict):
+    """The dataset of the normalized company table: the named one, or one kept with the run."""
+    name = actor_input.get('companiesDatasetName')
+    if name:
+        return await Actor.open_dataset(name=name)
+    return await Actor.open_dataset(alias=COMPANIES_DATASET_ALIAS)
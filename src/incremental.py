@@ -0,0 +1,112 @@
+"""
+Incremental change detection
+Remembers a fingerprint per profile so repeat runs only emit new or changed records
+"""
+
+import hashlib
+import json
+from typing import Dict, Iterable, List, Optional
+
+from apify import Actor
+
+FINGERPRINTS_KEY = 'FINGERPRINTS'
+DEFAULT_INCREMENTAL_STORE_NAME = 'linkedin-profile-fingerprints'
+
+
+def _digest(value) -> str:
+    """Short stable hash of a JSON-serializable value."""
+    normalized = json.dumps(value, sort_keys=True, separators=(',', ':'), ensure_ascii=False)
+    return hashlib.blake2b(normalized.encode('utf-8'), digest_size=8).hexdigest()
+
+
+class ChangeDetector:
+    """Fingerprints of the profiles emitted by earlier runs, kept in a named key-value store.
+
+    A fingerprint hashes the normalized ``basic_info`` plus the ``experience``
+    list. With field-level diffs enabled a hash per field is kept as well, so
+    changed records can say which fields changed.
+
+    A new fingerprint stays pending until the record it belongs to is
+    stored (``commit``), so a run that stops in between emits the record
+    again instead of remembering it as seen.
+    """
+
+    def __init__(self, store, diff: bool = False, ignore_fields: Iterable[str] = ()):
+        self.store = store
+        self.diff = diff
+        self.ignore_fields = set(ignore_fields)
+        self._fingerprints: Dict[str, object] = {}
+        self._pending: Dict[str, object] = {}
+        self.new = 0
+        self.changed = 0
+        self.unchanged = 0
+
+    async def load(self) -> None:
+        self._fingerprints = await self.store.get_value(FINGERPRINTS_KEY) or {}
+
+    async def save(self) -> None:
+        await self.store.set_value(FINGERPRINTS_KEY, self._fingerprints)
+
+    def _field_hashes(self, record: Dict) -> Dict[str, str]:
+        basic_info = record.get('basic_info') or {}
+        hashes = {
+            field: _digest(value)
+            for field, value in basic_info.items()
+            if field not in self.ignore_fields and value not in (None, '', [], {})
+        }
+        hashes['experience'] = _digest(record.get('experience') or [])
+        return hashes
+
+    def check(self, username: str, record: Dict) -> Optional[Dict]:
+        """Fingerprint the profile; return change details, or None if unchanged."""
+        fields = self._field_hashes(record)
+        fingerprint = _digest(fields)
+        previous = self._fingerprints.get(username)
+        previous_hash = previous.get('h') if isinstance(previous, dict) else previous
+
+        if previous_hash == fingerprint:
+            self.unchanged += 1
+            return None
+
+        self._pending[username] = {'h': fingerprint, 'f': fields} if self.diff else fingerprint
+        if previous is None:
+            self.new += 1
+            return {'change_type': 'new'}
+
+        self.changed += 1
+        change = {'change_type': 'changed'}
+        if self.diff and isinstance(previous, dict):
+            change['changed_fields'] = self._changed_fields(previous['f'], fields)
+        return change
+
+    async def commit(self, usernames: Iterable[str]) -> None:
+        """Keep the fingerprints of stored records; used from the dataset writer's flush callback."""
+        for username in usernames:
+            fingerprint = self._pending.pop(username, None)
+            if fingerprint is not None:
+                self._fingerprints[username] = fingerprint
+
+    @staticmethod
+    def _changed_fields(before: Dict[str, str], after: Dict[str, str]) -> List[str]:
+        return sorted(field for field in before.keys() | after.keys() if before.get(field) != after.get(field))
+
+    def stats(self) -> Dict:
+        return {'new': self.new, 'changed': self.changed, 'unchanged': self.unchanged}
+
+
+async def open_change_detector(actor_input: Dict) -> Optional[ChangeDetector]:
+    """Build the change detector when incremental mode is on, or return None."""
+    if not actor_input.get('incrementalMode'):
+        return None
+
+    # A named store outlives the run, the default one does not
+    store = await Actor.open_key_value_store(
+        name=actor_input.get('incrementalStoreName') or DEFAULT_INCREMENTAL_STORE_NAME
+    )
+    detector = ChangeDetector(
+        store,
+        diff=bool(actor_input.get('incrementalDiff')),
+        ignore_fields=actor_input.get('incrementalIgnoreFields') or (),
+    )
+    await detector.load()
+    return detector
@@ -3,20 +3,46 @@ LinkedIn Profile Scraper - Apify Actor
 Scrapes LinkedIn profiles with full experience data
 """
 
+import os
 import re
+import sys
 import json
-import html
 import asyncio
+import time
 import warnings
-from typing import Dict, List, Optional, Set, Tuple
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, ThreadPoolExecutor, wait
+from functools import lru_cache
+from typing import Dict, Iterable, List, Optional, Set, Tuple
 from datetime import datetime
 
-import requests
-from requests import Session
-from bs4 import BeautifulSoup
+import lxml.html
+from lxml import etree
 
 # Import Actor from apify (already installed in base image)
-from apify import Actor
+from apify import Actor, Event
+
+from src.accounts import Account, AccountPool
+from src.cache import open_response_cache
+from src.checkpoint import open_checkpoint
+from src.companies import open_companies_dataset, open_company_index
+from src.incremental import open_change_detector
+from src.metrics import METRICS_KEY, Progress, open_metrics
+from src.output import DEFAULT_BATCH_SIZE, DEFAULT_FLUSH_INTERVAL_SECONDS, DatasetWriter, open_exporter
+from src.parsing import open_parser_pool, parser_workers
+from src.sources import (
+    DuplicateFilter,
+    dedupe_capacity,
+    has_profile_source,
+    iter_profiles,
+    open_profiles_request_queue,
+)
+from src.ratelimit import (
+    DEFAULT_MAX_REQUESTS_PER_SECOND,
+    DEFAULT_MAX_RETRIES,
+    DEFAULT_REQUESTS_PER_SECOND,
+    AdaptiveRateLimiter,
+)
+from src.transport import LINKEDIN_URL, LinkedInTransport
 
 warnings.filterwarnings("ignore")
 
@@ -51,6 +77,8 @@ RE_NAME = re.compile(r'displayImageWithFrameReference":null,"a11yText":"([^"]+)"
 RE_NAME2 = re.compile(r'"originalImageUrn"\s*:\s*null\s*,\s*"a11yText"\s*:\s*"([^"]*)"')
 RE_WEBSITES = re.compile(r'https?://[^\s"<]+')
 RE_FSD = re.compile(r'elements":\["urn:li:fsd_profile:([^"]+)"')
+# The same ID in the raw contact page, where the embedded JSON is still HTML-escaped
+RE_FSD_HTML = re.compile(r'elements&quot;:\[&quot;urn:li:fsd_profile:([^&"]+)&quot;')
 RE_LOCATION = re.compile(r'"children":\["([^"]+)"\]')
 RE_OR_LOCATION = re.compile(r'"defaultLocalizedName":"([^"]+)"')
 RE_COUNTRY = re.compile(r'"countryISOCode":"([^"]+)"')
@@ -64,9 +92,27 @@ RE_HEADLINE = re.compile(r'"companyNameOnProfileTopCardShown":true,"headline":"(
 # Experience extraction patterns
 RE_EMP_TYPE = re.compile(r'·\s*(Full-time|Part-time|Contract|Internship|Freelance|Self-employed)', re.I)
 RE_WORK_TYPE = re.compile(r'\b(Remote|On-site|Onsite|Hybrid)\b', re.I)
+# The employment type and everything after it in a subtitle, and the work type mark in a location
+RE_EMP_TYPE_SUFFIX = re.compile(r'\s*·\s*(Full-time|Part-time|Contract|Internship|Freelance|Self-employed).*', re.I)
+RE_WORK_TYPE_MARK = re.compile(r'\s*\(?(Remote|On-site|Onsite|Hybrid)\)?\s*', re.I)
 RE_DATE = re.compile(r'([A-Za-z]+\s+\d{4}|\d{4})\s*[-–]\s*(Present|[A-Za-z]+\s+\d{4}|\d{4})?')
+RE_YEAR = re.compile(r'\d{4}')
+RE_MONTH_WORD = re.compile(r'[A-Za-z]+')
+# English month abbreviations, as matched by strptime's %b in the C locale
+MONTHS = {name: number for number, name in enumerate(
+    ('jan', 'feb', 'mar', 'apr', 'may', 'jun', 'jul', 'aug', 'sep', 'oct', 'nov', 'dec'), 1
+)}
 RE_COMPANY_ID = re.compile(r'/company/(\d+)')
 RE_LOGO = re.compile(r'company-logo[^"]*?/(\d+)/[^"]*logo[^"]*')
+RE_LOGO_URL = re.compile(r'https://media\.licdn\.com/dms/image/[^"]*company-logo[^"]*')
+
+# JSON string escapes embedded in the contact page (surrogate pair, \uXXXX, single char)
+RE_JSON_ESCAPE = re.compile(r'\\(?:u(d[89ab][0-9a-f]{2})\\u(d[c-f][0-9a-f]{2})|u([0-9a-f]{4})|(["\\/bfnrt]))', re.I)
+JSON_ESCAPES = {'"': '"', '\\': '\\', '/': '/', 'b': '\b', 'f': '\f', 'n': '\n', 'r': '\r', 't': '\t'}
+
+# Incremental decoding of the cards response
+JSON_DECODER = json.JSONDecoder()
+RE_JSON_WS = re.compile(r'[ \t\n\r]*')
 
 # Static IDs (update these if LinkedIn changes them)
 CARDS_ID = '55af784c21dc8640b500ab5b45937064'
@@ -74,69 +120,385 @@ PROFILES_ID = 'a1a483e719b20537a256b6853cdca711'
 
 BLOCKED_DOMAINS = ('linkedin.com', 'media.licdn.com')
 
+# Number of profiles scraped in parallel when the input does not set maxConcurrency
+DEFAULT_MAX_CONCURRENCY = 5
+# Default-executor threads reserved for storage I/O
+STORAGE_THREADS = 4
+
 
 # ============================================================================
 # UTILITY FUNCTIONS
 # ============================================================================
 
-def format_cookies(cookie_string: str) -> Dict[str, str]:
-    """Convert cookie string to dictionary format."""
-    cookies = {}
-    for item in cookie_string.split(';'):
-        item = item.strip()
-        if '=' in item:
-            key, value = item.split('=', 1)
-            cookies[key.strip()] = value.strip()
-    return cookies
+def _replace_json_escape(match: re.Match) -> str:
+    high, low, code, char = match.groups()
+    if char:
+        return JSON_ESCAPES[char]
+    if code:
+        return chr(int(code, 16))
+    return chr(0x10000 + ((int(high, 16) - 0xD800) << 10) + (int(low, 16) - 0xDC00))
+
+
+def decode_json_escapes(text: str) -> str:
+    """Decode the JSON string escapes of data embedded in a page.
+    
+    Works on str throughout, so multi-byte characters survive, and returns
+    the input unchanged when it holds no escapes.
+    """
+    if '\\' not in text:
+        return text
+    return RE_JSON_ESCAPE.sub(_replace_json_escape, text)
+
+
+def _year_month(text: str) -> Tuple[Optional[int], Optional[int]]:
+    """Year and month of one end of a duration, e.g. ``May 2022`` or ``2019``."""
+    year_match = RE_YEAR.search(text)
+    month_match = RE_MONTH_WORD.search(text)
+    return (
+        int(year_match.group(0)) if year_match else None,
+        MONTHS.get(month_match.group(0)[:3].lower()) if month_match else None,
+    )
+
+
+def parse_date_parts(text: str) -> Tuple[Optional[int], Optional[int], Optional[int], Optional[int], bool]:
+    """Parse a duration string into start year and month, end year and month, and is_current.
+    
+    The flat form of :func:`parse_date`, used while parsing experiences so
+    no date dicts are built for positions that are later dropped.
+    """
+    is_current = "Present" in text if text else False
+    match = RE_DATE.search(text) if text else None
+    if not match:
+        return None, None, None, None, is_current
+    
+    start, end = match.group(1), match.group(2) or "Present"
+    start_year, start_month = _year_month(start)
+    end_year, end_month = _year_month(end) if end != "Present" else (None, None)
+    return start_year, start_month, end_year, end_month, is_current
 
 
-def generate_chrome_user_agent() -> str:
-    """Generate a realistic Chrome user agent."""
-    return "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36"
+def _date_dict(year: Optional[int], month: Optional[int]) -> Dict:
+    date = {}
+    if year is not None:
+        date["year"] = year
+    if month is not None:
+        date["month"] = month
+    return date
 
 
 def parse_date(text: str) -> Dict:
     """Parse duration string into structured data."""
-    if not text:
-        return {"duration": text, "start_date": {}, "end_date": {}, "is_current": False}
-    
-    result = {
+    start_year, start_month, end_year, end_month, is_current = parse_date_parts(text)
+    return {
         "duration": text,
-        "start_date": {},
-        "end_date": {},
-        "is_current": "Present" in text
+        "start_date": _date_dict(start_year, start_month),
+        "end_date": _date_dict(end_year, end_month),
+        "is_current": is_current
     }
+
+
+def build_logo_index(cards_text: str, spans: Optional[List[Tuple[int, int]]] = None) -> Dict[str, str]:
+    """Map company IDs to their logo URLs with one scan per pattern.
     
-    match = RE_DATE.search(text)
-    if not match:
-        return result
+    A company ID resolves to the first logo URL that contains it after
+    the ``company-logo`` path segment. ``spans`` limits the scan to
+    ``(start, end)`` slices of the text.
+    """
+    if spans is None:
+        spans = [(0, len(cards_text))]
+    pending = list(dict.fromkeys(
+        match.group(1) for start, end in spans for match in RE_LOGO.finditer(cards_text, start, end)
+    ))
+    logos = {}
+    if not pending:
+        return logos
     
-    start, end = match.group(1), match.group(2) or "Present"
+    urls = (match for start, end in spans for match in RE_LOGO_URL.finditer(cards_text, start, end))
+    for match in urls:
+        url = match.group(0)
+        tail = url.partition('company-logo')[2]
+        found = [company_id for company_id in pending if company_id in tail]
+        if not found:
+            continue
+        for company_id in found:
+            logos[company_id] = url
+        pending = [company_id for company_id in pending if company_id not in logos]
+        if not pending:
+            break
     
-    # Parse start date
-    year_match = re.search(r'(\d{4})', start)
-    month_match = re.search(r'([A-Za-z]+)', start)
-    if year_match:
-        result["start_date"]["year"] = int(year_match.group(1))
-    if month_match:
-        try:
-            result["start_date"]["month"] = datetime.strptime(month_match.group(1)[:3], '%b').month
-        except:
-            pass
-    
-    # Parse end date
-    if end != "Present":
-        year_match = re.search(r'(\d{4})', end)
-        month_match = re.search(r'([A-Za-z]+)', end)
-        if year_match:
-            result["end_date"]["year"] = int(year_match.group(1))
-        if month_match:
-            try:
-                result["end_date"]["month"] = datetime.strptime(month_match.group(1)[:3], '%b').month
-            except:
-                pass
+    return logos
+
+
+def _skip_ws(text: str, idx: int) -> int:
+    return RE_JSON_WS.match(text, idx).end()
+
+
+def _iter_array(text: str, idx: int):
+    """Yield ``(item, start, end)`` for each element of the JSON array at ``idx``, one at a time."""
+    idx = _skip_ws(text, idx + 1)
+    if text.startswith(']', idx):
+        return
+    while True:
+        item, end = JSON_DECODER.raw_decode(text, idx)
+        yield item, idx, end
+        idx = _skip_ws(text, end)
+        if not text.startswith(',', idx):
+            return
+        idx = _skip_ws(text, idx + 1)
+
+
+def _skip_value(text: str, idx: int) -> int:
+    """Index just past the JSON value at ``idx``; arrays are stepped through element by element."""
+    if not text.startswith('[', idx):
+        return JSON_DECODER.raw_decode(text, idx)[1]
+    end = idx + 1
+    for _, _, end in _iter_array(text, idx):
+        pass
+    return text.index(']', end) + 1
+
+
+def _iter_members(text: str, idx: int):
+    """Yield ``(key, value_start)`` for each member of the JSON object at ``idx``."""
+    idx = _skip_ws(text, idx)
+    if not text.startswith('{', idx):
+        return
+    idx = _skip_ws(text, idx + 1)
+    if text.startswith('}', idx):
+        return
+    while True:
+        key, idx = JSON_DECODER.raw_decode(text, idx)
+        idx = _skip_ws(text, _skip_ws(text, idx) + 1)
+        yield key, idx
+        idx = _skip_ws(text, _skip_value(text, idx))
+        if not text.startswith(',', idx):
+            return
+        idx = _skip_ws(text, idx + 1)
+
+
+def _find_included(cards_text: str) -> Optional[int]:
+    """Start of the ``included`` list to read: ``data.included`` when it has entities, else the top-level one."""
+    top_level = None
+    seen_data = False
+    for key, idx in _iter_members(cards_text, 0):
+        if key == 'data':
+            seen_data = True
+            for data_key, data_idx in _iter_members(cards_text, idx):
+                if data_key == 'included' and cards_text.startswith('[', data_idx):
+                    if not cards_text.startswith(']', _skip_ws(cards_text, data_idx + 1)):
+                        return data_idx
+                    break
+        elif key == 'included' and cards_text.startswith('[', idx):
+            top_level = idx
+        if seen_data and top_level is not None:
+            break
+    return top_level
+
+
+def scan_profile_cards(cards_text: str) -> Tuple[List[Dict], Optional[str], Dict[str, str]]:
+    """Pull the experience cards, about text and company logos out of a cards response.
     
-    return result
+    The ``included`` entities are decoded one at a time and dropped unless
+    they are experience cards, so the full response is never held as one
+    parsed tree. ``data.included`` wins over the top-level list when it has
+    entities. The about text and logos are read from the raw text of each
+    entity as it goes by.
+    """
+    # Like json.loads before, reject an error page instead of reading it as an empty profile
+    if not cards_text.startswith('{', _skip_ws(cards_text, 0)):
+        raise ValueError('Profile cards response is not a JSON object')
+    start = _find_included(cards_text)
+    if start is None:
+        return [], None, {}
+    
+    experience_cards = []
+    about = None
+    logo_spans = []
+    for item, item_start, item_end in _iter_array(cards_text, start):
+        if about is None:
+            about_match = RE_ABOUT.search(cards_text, item_start, item_end)
+            if about_match:
+                about = about_match.group(1)
+        if cards_text.find('company-logo', item_start, item_end) != -1:
+            logo_spans.append((item_start, item_end))
+        
+        urn = item.get("entityUrn", "") if isinstance(item, dict) else ""
+        if "EXPERIENCE" in urn and "fsd_profileCard" in urn:
+            experience_cards.append(item)
+    
+    return experience_cards, about, build_logo_index(cards_text, logo_spans)
+
+
+class Experience:
+    """One position while the cards are parsed.
+    
+    Slots instead of an 11-key dict, flat date parts instead of nested date
+    dicts, and interned employment and work types; the output dict is only
+    built for positions that survive de-duplication.
+    """
+    
+    __slots__ = (
+        'title', 'company', 'employment_type', 'location', 'work_type', 'duration',
+        'start_year', 'start_month', 'end_year', 'end_month', 'is_current',
+        'company_linkedin_url', 'company_logo_url', 'company_id',
+    )
+    
+    def __init__(self):
+        self.title = self.company = self.employment_type = self.location = self.work_type = None
+        self.duration = None
+        self.start_year = self.start_month = self.end_year = self.end_month = None
+        self.is_current = False
+        self.company_linkedin_url = self.company_logo_url = self.company_id = None
+    
+    def to_dict(self) -> Dict:
+        """Output form: empty values left out, dates as ``{"year", "month"}`` dicts."""
+        exp = {}
+        for name in ('title', 'company', 'employment_type', 'location', 'work_type', 'duration'):
+            value = getattr(self, name)
+            if value not in (None, ""):
+                exp[name] = value
+        start_date = _date_dict(self.start_year, self.start_month)
+        if start_date:
+            exp["start_date"] = start_date
+        exp["is_current"] = self.is_current
+        for name in ('company_linkedin_url', 'company_logo_url', 'company_id'):
+            value = getattr(self, name)
+            if value not in (None, ""):
+                exp[name] = value
+        end_date = _date_dict(self.end_year, self.end_month)
+        if end_date:
+            exp["end_date"] = end_date
+        return exp
+
+
+class FieldScanner:
+    """Reads several fields from one response without a regex search per field.
+    
+    Each field is a literal anchor that starts every match, plus the pattern
+    matched at the anchor. ``str.find`` jumps from anchor to anchor much
+    faster than the regex engine searches, and the pattern only runs where
+    its anchor is, stopping at the first match. Fields marked ``many``
+    need every match anyway and are collected by the regex engine like
+    ``findall``. Missing fields come back as None, or as an empty list.
+    """
+    
+    def __init__(self, fields: Dict[str, Tuple[str, Optional[re.Pattern], bool]]):
+        # A field without a pattern is a plain presence check on its anchor
+        self.fields = {
+            name: (anchor, pattern or re.compile(re.escape(anchor)), many)
+            for name, (anchor, pattern, many) in fields.items()
+        }
+    
+    def scan(self, text: str) -> Dict:
+        """Map each field to its first match, or to all of its matches."""
+        return {
+            name: list(pattern.finditer(text)) if many else self._find(text, anchor, pattern)
+            for name, (anchor, pattern, many) in self.fields.items()
+        }
+    
+    def find(self, text: str, name: str) -> Optional[re.Match]:
+        """First match of a single field."""
+        anchor, pattern, _ = self.fields[name]
+        return self._find(text, anchor, pattern)
+    
+    @staticmethod
+    def _find(text: str, anchor: str, pattern: re.Pattern) -> Optional[re.Match]:
+        idx = text.find(anchor)
+        while idx != -1:
+            match = pattern.match(text, idx)
+            if match:
+                return match
+            idx = text.find(anchor, idx + 1)
+        return None
+
+
+# Fields of the Voyager profile response
+PROFILE_FIELDS = FieldScanner({
+    'first_name': (':null,"firstName":"', RE_FIRST_NAME, False),
+    'last_name': ('"lastName":"', RE_LAST_NAME, False),
+    'headline': ('"companyNameOnProfileTopCardShown":true,"headline":"', RE_HEADLINE, False),
+    'follower_count': ('"followerCount":', RE_FOLLOWER, False),
+    'connection_count': ('"connections":{"paging":{"count":', RE_CONNECTIONS, False),
+    'is_creator': ('"creator":true,"verificationData', None, False),
+    'is_memorialized': ('"memorialized":true', None, False),
+})
+
+# Fields of the decoded contact page; the FSD ID is read the same way from the profile response
+CONTACT_FIELDS = FieldScanner({
+    'name': ('displayImageWithFrameReference":null,"a11yText":"', RE_NAME, False),
+    'name2': ('"originalImageUrn"', RE_NAME2, False),
+    'email': ('"url":"mailto:', RE_EMAIL, False),
+    'websites': ('http', RE_WEBSITES, True),
+    'fsd': ('elements":["urn:li:fsd_profile:', RE_FSD, False),
+    'locations': ('"children":["', RE_LOCATION, True),
+    'localized_locations': ('"defaultLocalizedName":"', RE_OR_LOCATION, True),
+})
+
+# Responses each output field is read from; 'experience' is the only field outside basic_info
+FIELD_SOURCES = {
+    'fullname': ('profile', 'contact'),
+    'first_name': ('profile',),
+    'last_name': ('profile',),
+    'headline': ('profile',),
+    'public_identifier': (),
+    'profile_url': (),
+    'about': ('cards',),
+    'location': ('contact',),
+    'is_creator': ('profile',),
+    'is_premium': ('contact',),
+    'open_to_work': ('contact',),
+    'is_remembrance': ('profile', 'contact'),
+    'urn': ('fsd',),
+    'follower_count': ('profile',),
+    'connection_count': ('profile',),
+    'email': ('contact',),
+    'websites': ('contact',),
+    'experience': ('cards',),
+}
+
+
+class FieldPlan:
+    """Requests and parsing stages needed for a selection of output fields.
+    
+    The cards query is addressed by the FSD profile ID, which the contact
+    page and the profile response both carry; when neither is otherwise
+    needed, the profile response is fetched for it.
+    """
+    
+    def __init__(self, fields: Optional[Iterable[str]] = None):
+        selected = frozenset(fields) if fields else frozenset(FIELD_SOURCES)
+        unknown = selected - FIELD_SOURCES.keys()
+        if unknown:
+            raise ValueError(
+                f"Unknown field(s): {', '.join(sorted(unknown))}. "
+                f"Choose from: {', '.join(FIELD_SOURCES)}"
+            )
+        self.fields = selected
+        self.complete = selected == FIELD_SOURCES.keys()
+        sources = {source for name in selected for source in FIELD_SOURCES[name]}
+        self.contact = 'contact' in sources
+        self.cards = 'cards' in sources
+        self.experience = 'experience' in selected
+        self.fsd = self.cards or 'fsd' in sources
+        self.profile_fields = 'profile' in sources
+        self.profile = self.profile_fields or (self.fsd and not self.contact)
+    
+    @property
+    def requests(self) -> int:
+        return self.contact + self.profile + self.cards
+    
+    def select(self, record: Dict) -> Dict:
+        """Drop the fields that were not asked for from a built record."""
+        if self.complete:
+            return record
+        selected = {'basic_info': {
+            name: value for name, value in record['basic_info'].items() if name in self.fields
+        }}
+        if self.experience:
+            selected['experience'] = record['experience']
+        return selected
+
+
+FULL_PLAN = FieldPlan()
 
 
 # ============================================================================
@@ -146,86 +508,101 @@ def parse_date(text: str) -> Dict:
 class LinkedInProfileScraper:
     """Fast and efficient LinkedIn profile scraper."""
     
-    def __init__(self, username: str, cookies: str):
-        """Initialize scraper with username and cookies."""
+    def __init__(
+        self,
+        username: str,
+        cookies: str = '',
+        transport: Optional[LinkedInTransport] = None,
+        plan: FieldPlan = FULL_PLAN,
+    ):
+        """Initialize scraper with username and cookies or a shared transport."""
         self.username = username
-        self.cookies = format_cookies(cookies)
-        self.session = Session()
-        self.session.verify = False
-        
-        # Set up headers
-        user_agent = generate_chrome_user_agent()
-        self.headers = {
-            'accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,image/webp,*/*;q=0.8',
-            'accept-language': 'en-US,en;q=0.9',
-            'user-agent': user_agent,
-            'referer': 'https://www.linkedin.com/',
-        }
-        
-        self.voyager_headers = {
-            'accept': 'application/vnd.linkedin.normalized+json+2.1',
-            'accept-language': 'en-US,en;q=0.9',
-            'csrf-token': self.cookies.get('JSESSIONID', '').strip('"'),
-            'user-agent': user_agent,
-            'x-li-lang': 'en_US',
-            'x-restli-protocol-version': '2.0.0',
-        }
+        self.plan = plan
+        self.transport = transport or LinkedInTransport(cookies)
+        self.cookies = self.transport.cookies
+        self.headers = self.transport.headers
+        self.voyager_headers = self.transport.voyager_headers
+        self.metrics = self.transport.metrics
         
         # Cache for profile data
         self._contact_info = None
-        self._decoded_html = None
+        self._contact_document = None
         self.fsd_profile = None
     
+    def _cache_key(self, endpoint: str, identifier: str) -> Optional[str]:
+        """Response cache key, or None when the run has no cache."""
+        if self.transport.cache is None:
+            return None
+        return self.transport.cache.make_key(endpoint, identifier)
+    
     def _fetch_contact_info(self) -> str:
         """Fetch and cache contact information page."""
         if self._contact_info is None:
-            url = f'https://www.linkedin.com/in/{self.username}/overlay/contact-info/'
-            response = self.session.get(url, cookies=self.cookies, headers=self.headers)
-            response.raise_for_status()
-            self._contact_info = response.text
+            url = f'{self.transport.base_url}/in/{self.username}/overlay/contact-info/'
+            self._contact_info = self.transport.fetch_text(
+                url, cache_key=self._cache_key('contact', self.username), endpoint='contact'
+            )
         return self._contact_info
     
-    def _get_decoded_html(self) -> str:
-        """Get decoded and unescaped HTML."""
-        if self._decoded_html is None:
+    def _get_contact_document(self) -> Tuple[str, Optional[str]]:
+        """Parse the contact page once and return its decoded text and title.
+        
+        lxml resolves HTML entities while parsing, so only the JSON escapes
+        of the embedded data blocks are left to decode afterwards.
+        """
+        if self._contact_document is None:
             contact_html = self._fetch_contact_info()
-            self._decoded_html = html.unescape(contact_html).encode('utf-8').decode('unicode_escape')
-        return self._decoded_html
+            with self.metrics.timer('parse_contact'):
+                text, title = '', None
+                try:
+                    doc = lxml.html.fromstring(contact_html)
+                except ValueError:
+                    # lxml rejects str input that carries an XML encoding declaration
+                    doc = lxml.html.fromstring(contact_html.encode('utf-8'))
+                except etree.ParserError:
+                    # Empty document
+                    doc = None
+                if doc is not None:
+                    title = doc.findtext('.//title')
+                    etree.strip_elements(doc, 'script', 'style', 'template', with_tail=False)
+                    # Decode node by node: nodes without escapes are passed through uncopied
+                    text = ''.join([decode_json_escapes(piece) for piece in doc.itertext()])
+                self._contact_document = (text, title)
+        return self._contact_document
+    
+    def _get_decoded_html(self) -> str:
+        """Get the decoded text of the contact page."""
+        return self._get_contact_document()[0]
     
     def _extract_basic_info(self) -> Dict:
         """Extract basic profile information from contact page."""
-        decoded = self._get_decoded_html()
+        fields = CONTACT_FIELDS.scan(self._get_decoded_html())
         
         # Name
-        name_match = RE_NAME.search(decoded) or RE_NAME2.search(decoded)
+        name_match = fields['name'] or fields['name2']
         fullname = name_match.group(1).replace(' is open to work', '') if name_match else None
         
         # Email
-        email_match = RE_EMAIL.search(decoded)
-        email = email_match.group(1) if email_match else None
+        email = fields['email'].group(1) if fields['email'] else None
         
         # Websites
-        soup = BeautifulSoup(decoded, 'html.parser')
-        websites = RE_WEBSITES.findall(soup.get_text())
+        websites = [m.group(0) for m in fields['websites']]
         websites = [s for s in websites if not any(b in s for b in BLOCKED_DOMAINS)]
         
         # FSD Profile ID
-        fsd_match = RE_FSD.search(decoded)
-        if fsd_match:
-            self.fsd_profile = fsd_match.group(1)
+        if fields['fsd']:
+            self.fsd_profile = fields['fsd'].group(1)
         
         # Location
         location = None
-        location_matches = RE_LOCATION.findall(decoded)
-        for loc in location_matches:
+        for loc in (m.group(1) for m in fields['locations']):
             country = loc.rsplit(",", 1)[-1].strip()
             if COUNTRY_CODES.get(country):
                 location = loc
                 break
         
-        if not location:
-            or_locations = RE_OR_LOCATION.findall(decoded)
-            location = or_locations[-1] if or_locations else None
+        if not location and fields['localized_locations']:
+            location = fields['localized_locations'][-1].group(1)
         
         return {
             'fullname': fullname,
@@ -235,67 +612,96 @@ class LinkedInProfileScraper:
             'name_match': name_match
         }
     
-    def _fetch_profile_data(self) -> Tuple[str, str]:
-        """Fetch profile and cards data from LinkedIn API."""
-        # Fetch profile data
+    def _fetch_profile_text(self) -> str:
+        """Fetch the Voyager profile query, which only needs the username."""
         prof_url = (
-            f'https://www.linkedin.com/voyager/api/graphql'
+            f'{self.transport.base_url}/voyager/api/graphql'
             f'?includeWebMetadata=true'
             f'&variables=(vanityName:{self.username})'
             f'&queryId=voyagerIdentityDashProfiles.{PROFILES_ID}'
         )
         
-        prof_resp = self.session.get(
-            prof_url,
-            cookies=self.cookies,
-            headers=self.voyager_headers
+        return self.transport.fetch_text(
+            prof_url, voyager=True, cache_key=self._cache_key('profile', self.username), endpoint='profile'
         )
-        prof_resp.raise_for_status()
-        prof_text = prof_resp.text
-        
-        # Extract FSD if not already set
-        if not self.fsd_profile:
-            fsd_match = RE_FSD.search(prof_text)
-            if fsd_match:
-                self.fsd_profile = fsd_match.group(1)
-            else:
-                raise ValueError("Could not extract FSD profile ID")
-        
-        # Fetch cards data
+    
+    def _fetch_cards_text(self) -> str:
+        """Fetch the Voyager profile cards query for the known FSD profile ID."""
         cards_url = (
-            f'https://www.linkedin.com/voyager/api/graphql'
+            f'{self.transport.base_url}/voyager/api/graphql'
             f'?variables=(profileUrn:urn%3Ali%3Afsd_profile%3A{self.fsd_profile})'
             f'&queryId=voyagerIdentityDashProfileCards.{CARDS_ID}'
         )
         
-        cards_resp = self.session.get(
-            cards_url,
-            cookies=self.cookies,
-            headers=self.voyager_headers
+        return self.transport.fetch_text(
+            cards_url, voyager=True, cache_key=self._cache_key('cards', self.fsd_profile), endpoint='cards'
         )
-        cards_resp.raise_for_status()
-        
-        return prof_text, cards_resp.text
     
-    def _extract_experiences(self, cards_data: Dict, cards_text: str) -> List[Dict]:
-        """Extract work experience from cards data."""
-        # Extract company logos
-        logos = {}
-        for match in RE_LOGO.finditer(cards_text):
-            company_id = match.group(1)
-            logo_pattern = rf'(https://media\.licdn\.com/dms/image/[^"]*company-logo[^"]*{company_id}[^"]*)'
-            logo_match = re.search(logo_pattern, cards_text)
-            if logo_match:
-                logos[company_id] = logo_match.group(1)
+    def _fetch_profile_data(self, parse_contact: bool = True) -> Tuple[Optional[str], Optional[str]]:
+        """Fetch the contact page, profile and cards data the field plan needs.
         
-        experiences = []
-        included = cards_data.get("data", {}).get("included", []) or cards_data.get("included", [])
+        The contact page and the profile query run in parallel. The cards
+        query starts as soon as either response yields the FSD profile ID.
+        Without ``parse_contact`` the contact page is only fetched, and the
+        ID is looked up in its raw HTML. A response the plan does not need
+        comes back as None, unless it has to be fetched for the ID after all.
+        """
+        executor = self.transport.executor
+        fetch_contact = self._get_decoded_html if parse_contact else self._fetch_contact_info
+        futures = {}
+        if self.plan.contact:
+            futures[executor.submit(fetch_contact)] = 'contact'
+        if self.plan.profile:
+            futures[executor.submit(self._fetch_profile_text)] = 'profile'
+        results = {}
+        pending = set(futures)
         
-        for item in included:
-            urn = item.get("entityUrn", "")
-            if "EXPERIENCE" not in urn or "fsd_profileCard" not in urn:
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                results[futures[future]] = future.result()
+            
+            if not self.plan.fsd or 'cards' in futures.values():
                 continue
             
+            # Extract FSD from whichever source has arrived
+            if not self.fsd_profile:
+                fsd_match = None
+                if 'contact' in results:
+                    contact = results['contact']
+                    fsd_match = CONTACT_FIELDS.find(contact, 'fsd') if parse_contact else RE_FSD_HTML.search(contact)
+                fsd_match = fsd_match or CONTACT_FIELDS.find(results.get('profile', ''), 'fsd')
+                if fsd_match:
+                    self.fsd_profile = fsd_match.group(1)
+            
+            if not self.fsd_profile and not pending and not parse_contact and 'contact' in results:
+                # The ID may only be readable once the page is decoded
+                fsd_match = CONTACT_FIELDS.find(self._get_decoded_html(), 'fsd')
+                if fsd_match:
+                    self.fsd_profile = fsd_match.group(1)
+            
+            if self.fsd_profile:
+                if self.plan.cards:
+                    cards_future = executor.submit(self._fetch_cards_text)
+                    futures[cards_future] = 'cards'
+                    pending.add(cards_future)
+            elif not pending:
+                # Fall back to the response the plan skipped before giving up
+                missing = [source for source in ('profile', 'contact') if source not in results]
+                if not missing:
+                    raise ValueError("Could not extract FSD profile ID")
+                fetch = self._fetch_profile_text if missing[0] == 'profile' else fetch_contact
+                future = executor.submit(fetch)
+                futures[future] = missing[0]
+                pending.add(future)
+        
+        return results.get('profile'), results.get('cards')
+    
+    def _extract_experiences(self, experience_cards: List[Dict], logos: Dict[str, str]) -> List[Dict]:
+        """Extract work experience from the experience cards."""
+        experiences: List[Experience] = []
+        
+        for item in experience_cards:
             for comp in item.get("topComponents", []):
                 fixed_list = comp.get("components", {}).get("fixedListComponent")
                 if not fixed_list:
@@ -314,7 +720,7 @@ class LinkedInProfileScraper:
                     sub_components = (entity.get("subComponents") or {}).get("components", [])
                     
                     if sub_components:
-                        parent_info = (exp["title"], exp["company_linkedin_url"], exp["company_id"])
+                        parent_info = (exp.title, exp.company_linkedin_url, exp.company_id)
                         has_nested = False
                         
                         for nested in sub_components:
@@ -325,59 +731,45 @@ class LinkedInProfileScraper:
                                     continue
                                 
                                 # Inherit parent company info if missing
-                                if not nested_exp["company"] or "mos" in str(nested_exp.get("company", "")) or "yrs" in str(nested_exp.get("company", "")):
-                                    nested_exp["company"] = parent_info[0]
-                                nested_exp["company_linkedin_url"] = nested_exp["company_linkedin_url"] or parent_info[1]
-                                nested_exp["company_id"] = nested_exp["company_id"] or parent_info[2]
+                                if not nested_exp.company or "mos" in str(nested_exp.company) or "yrs" in str(nested_exp.company):
+                                    nested_exp.company = parent_info[0]
+                                nested_exp.company_linkedin_url = nested_exp.company_linkedin_url or parent_info[1]
+                                nested_exp.company_id = nested_exp.company_id or parent_info[2]
                                 
                                 if parent_info[2] and parent_info[2] in logos:
-                                    nested_exp["company_logo_url"] = logos[parent_info[2]]
+                                    nested_exp.company_logo_url = logos[parent_info[2]]
                                 
-                                if nested_exp["title"]:
+                                if nested_exp.title:
                                     experiences.append(nested_exp)
                                     has_nested = True
                         
-                        if not has_nested and exp["title"]:
+                        if not has_nested and exp.title:
                             experiences.append(exp)
-                    elif exp["title"]:
+                    elif exp.title:
                         experiences.append(exp)
         
-        # Deduplicate
+        # Deduplicate, building the output dicts only for the positions kept
         seen: Set[Tuple] = set()
         result = []
         for exp in experiences:
-            key = (exp["title"], exp["company"], exp.get("start_date", {}).get("year"))
+            key = (exp.title, exp.company, exp.start_year)
             if key not in seen:
                 seen.add(key)
-                # Remove None and empty values
-                cleaned = {k: v for k, v in exp.items() if v not in (None, {}, "")}
-                result.append(cleaned)
+                result.append(exp.to_dict())
         
         return result
     
-    def _parse_experience(self, entity: Dict, logos: Dict[str, str]) -> Optional[Dict]:
+    def _parse_experience(self, entity: Dict, logos: Dict[str, str]) -> Optional[Experience]:
         """Parse a single experience entity."""
         if not entity:
             return None
         
-        exp = {
-            "title": None,
-            "company": None,
-            "employment_type": None,
-            "location": None,
-            "work_type": None,
-            "duration": None,
-            "start_date": {},
-            "is_current": False,
-            "company_linkedin_url": None,
-            "company_logo_url": None,
-            "company_id": None
-        }
+        exp = Experience()
         
         # Title
         title_v2 = entity.get("titleV2") or {}
         text_obj = title_v2.get("text") or {}
-        exp["title"] = text_obj.get("text") if isinstance(text_obj, dict) else None
+        exp.title = text_obj.get("text") if isinstance(text_obj, dict) else None
         
         # Company & employment type
         subtitle = entity.get("subtitle") or {}
@@ -385,69 +777,86 @@ class LinkedInProfileScraper:
         if subtitle_text:
             emp_match = RE_EMP_TYPE.search(subtitle_text)
             if emp_match:
-                exp["employment_type"] = emp_match.group(1)
-            exp["company"] = re.sub(
-                r'\s*·\s*(Full-time|Part-time|Contract|Internship|Freelance|Self-employed).*',
-                '', subtitle_text, flags=re.I
-            ).strip() or None
+                exp.employment_type = sys.intern(emp_match.group(1))
+            exp.company = RE_EMP_TYPE_SUFFIX.sub('', subtitle_text).strip() or None
         
         # Duration
         caption = entity.get("caption") or {}
         caption_text = caption.get("text", "") if caption else ""
-        date_info = parse_date(caption_text)
-        exp.update({
-            "duration": date_info["duration"],
-            "start_date": date_info["start_date"],
-            "is_current": date_info["is_current"]
-        })
-        if date_info["end_date"]:
-            exp["end_date"] = date_info["end_date"]
+        exp.duration = caption_text
+        exp.start_year, exp.start_month, exp.end_year, exp.end_month, exp.is_current = parse_date_parts(caption_text)
         
         # Location & work type
         metadata = entity.get("metadata") or {}
         metadata_text = metadata.get("text", "") if metadata else ""
         if metadata_text:
-            exp["location"] = metadata_text
+            exp.location = metadata_text
             work_type_match = RE_WORK_TYPE.search(metadata_text)
             if work_type_match:
                 work_type = work_type_match.group(1)
-                exp["work_type"] = "On-site" if work_type.lower() == "onsite" else work_type
-                exp["location"] = re.sub(
-                    r'\s*\(?(Remote|On-site|Onsite|Hybrid)\)?\s*',
-                    '', metadata_text, flags=re.I
-                ).strip() or None
+                exp.work_type = "On-site" if work_type.lower() == "onsite" else sys.intern(work_type)
+                exp.location = RE_WORK_TYPE_MARK.sub('', metadata_text).strip() or None
         
         # Company URL and logo
         image = entity.get("image") or {}
         action_target = (image.get("actionTarget", "") if image else "") or entity.get("textActionTarget", "")
         if action_target and "/company/" in action_target:
-            exp["company_linkedin_url"] = action_target
+            exp.company_linkedin_url = action_target
             company_id_match = RE_COMPANY_ID.search(action_target)
             if company_id_match:
                 company_id = company_id_match.group(1)
-                exp["company_id"] = company_id
+                exp.company_id = company_id
                 if company_id in logos:
-                    exp["company_logo_url"] = logos[company_id]
+                    exp.company_logo_url = logos[company_id]
         
         return exp
     
-    def get_profile(self) -> Dict:
-        """Get complete profile information."""
-        # Extract basic info
-        basic = self._extract_basic_info()
-        decoded = self._get_decoded_html()
+    def _extract_profile_fields(self, prof_text: str) -> Dict:
+        """Extract the fields read straight from the profile response."""
+        fields = PROFILE_FIELDS.scan(prof_text)
+        
+        def value(name):
+            return fields[name].group(1) if fields[name] else None
+        
+        return {
+            "first_name": value('first_name'),
+            "last_name": value('last_name'),
+            "headline": value('headline'),
+            "follower_count": int(value('follower_count')) if fields['follower_count'] else None,
+            "connection_count": int(value('connection_count')) if fields['connection_count'] else None,
+            "is_creator": fields['is_creator'] is not None,
+            "is_memorialized": fields['is_memorialized'] is not None,
+        }
+    
+    def _build_profile(self, prof_text: Optional[str], cards_text: Optional[str]) -> Dict:
+        """Parse the fetched contact page, profile and cards into the output record.
+        
+        Only the stages the field plan needs are run; the fields of a
+        skipped stage keep their empty values until the plan drops them.
+        """
+        basic = {'fullname': None, 'email': None, 'websites': [], 'location': None, 'name_match': None}
+        decoded, title = '', None
+        if self.plan.contact:
+            with self.metrics.timer('parse_basic_info'):
+                basic = self._extract_basic_info()
+            decoded, title = self._get_contact_document()
         
-        # Fetch API data
-        prof_text, cards_text = self._fetch_profile_data()
-        cards_data = json.loads(cards_text) if cards_text else {}
+        experience_cards, about, logos = [], None, {}
+        if self.plan.cards and cards_text:
+            with self.metrics.timer('parse_cards'):
+                experience_cards, about, logos = scan_profile_cards(cards_text)
         
         # Extract additional fields
-        first_name_match = RE_FIRST_NAME.search(prof_text)
-        last_name_match = RE_LAST_NAME.search(prof_text)
-        headline_match = RE_HEADLINE.search(prof_text)
-        about_match = RE_ABOUT.search(cards_text)
-        follower_match = RE_FOLLOWER.search(prof_text)
-        connections_match = RE_CONNECTIONS.search(prof_text)
+        if self.plan.profile_fields and prof_text:
+            with self.metrics.timer('parse_profile_fields'):
+                fields = self._extract_profile_fields(prof_text)
+        else:
+            fields = self._extract_profile_fields('')
+        
+        experiences = []
+        if self.plan.experience:
+            with self.metrics.timer('parse_experiences'):
+                experiences = self._extract_experiences(experience_cards, logos)
         
         # Parse location
         country = None
@@ -459,31 +868,29 @@ class LinkedInProfileScraper:
             country_code = COUNTRY_CODES.get(country)
         
         # Get full name from title tag if needed
-        soup = BeautifulSoup(decoded, 'html.parser')
-        title_tag = soup.find('title')
-        title_fullname = title_tag.text.replace(' | LinkedIn', '') if title_tag else None
+        title_fullname = title.replace(' | LinkedIn', '') if title is not None else None
         
         # Build final response
-        return {
+        return self.plan.select({
             "basic_info": {
                 "fullname": (
-                    f"{first_name_match.group(1)} {last_name_match.group(1)}"
-                    if first_name_match and last_name_match
+                    f"{fields['first_name']} {fields['last_name']}"
+                    if fields['first_name'] and fields['last_name']
                     else title_fullname or basic['fullname']
                 ),
-                "first_name": first_name_match.group(1) if first_name_match else None,
-                "last_name": last_name_match.group(1) if last_name_match else None,
-                "headline": headline_match.group(1) if headline_match else None,
+                "first_name": fields['first_name'],
+                "last_name": fields['last_name'],
+                "headline": fields['headline'],
                 "public_identifier": self.username,
                 "profile_url": f"https://linkedin.com/in/{self.username}",
-                "about": about_match.group(1) if about_match else None,
+                "about": about,
                 "location": {
                     "country": country,
                     "full": basic['location'],
                     "city": city,
                     "country_code": country_code
                 },
-                "is_creator": '"creator":true,"verificationData' in prof_text,
+                "is_creator": fields['is_creator'],
                 "is_premium": (
                     '"premium":true' in decoded or
                     'is a Premium member' in decoded
@@ -493,70 +900,398 @@ class LinkedInProfileScraper:
                     if basic['name_match'] else False
                 ),
                 "is_remembrance": (
-                    '"memorialized":true' in prof_text or
+                    fields['is_memorialized'] or
                     'In remembrance' in decoded
                 ),
                 "urn": self.fsd_profile,
-                "follower_count": int(follower_match.group(1)) if follower_match else None,
-                "connection_count": int(connections_match.group(1)) if connections_match else None,
+                "follower_count": fields['follower_count'],
+                "connection_count": fields['connection_count'],
                 "email": basic['email'],
                 "websites": basic['websites'],
             },
-            "experience": self._extract_experiences(cards_data, cards_text)
-        }
+            "experience": experiences
+        })
+    
+    def fetch_payloads(self) -> Tuple[Optional[str], Optional[str], Optional[str], Optional[str]]:
+        """Fetch the raw contact page, profile and cards for parsing in another process."""
+        with self.metrics.timer('profile_fetch'):
+            prof_text, cards_text = self._fetch_profile_data(parse_contact=False)
+        return self._contact_info, prof_text, cards_text, self.fsd_profile
+    
+    def get_profile(self) -> Dict:
+        """Get complete profile information."""
+        with self.metrics.timer('profile_fetch'):
+            prof_text, cards_text = self._fetch_profile_data()
+        with self.metrics.timer('profile_parse'):
+            return self._build_profile(prof_text, cards_text)
 
 
 # ============================================================================
 # APIFY ACTOR MAIN FUNCTION
 # ============================================================================
 
+@lru_cache(maxsize=1)
+def _parser_transport() -> LinkedInTransport:
+    """Request-less transport that parser processes build their scrapers on."""
+    return LinkedInTransport('')
+
+
+def parse_profile(
+    username: str,
+    contact_html: Optional[str],
+    prof_text: Optional[str],
+    cards_text: Optional[str],
+    fsd_profile: Optional[str],
+    plan: FieldPlan = FULL_PLAN,
+) -> Dict:
+    """Build a profile record from fetched payloads; runs in a parser process."""
+    scraper = LinkedInProfileScraper(username, transport=_parser_transport(), plan=plan)
+    scraper._contact_info = contact_html
+    scraper.fsd_profile = fsd_profile
+    return scraper._build_profile(prof_text, cards_text)
+
+
+async def scrape_profile(
+    username: str,
+    transport: LinkedInTransport,
+    parser_pool: Optional[ProcessPoolExecutor] = None,
+    plan: FieldPlan = FULL_PLAN,
+) -> Dict:
+    """Scrape one profile off the event loop and build its output record.
+    
+    With a parser pool, this process only fetches; the payloads of the
+    profile are sent to a parser process in a single task.
+    """
+    scraper = LinkedInProfileScraper(username, transport=transport, plan=plan)
+    if parser_pool is None:
+        profile_data = await asyncio.to_thread(scraper.get_profile)
+    else:
+        payloads = await asyncio.to_thread(scraper.fetch_payloads)
+        with transport.metrics.timer('profile_parse'):
+            profile_data = await asyncio.get_running_loop().run_in_executor(
+                parser_pool, parse_profile, username, *payloads, plan
+            )
+    profile_data['scraped_at'] = datetime.utcnow().isoformat()
+    profile_data['scrape_status'] = 'success'
+    return profile_data
+
+
+def failure_record(username: str, error) -> Dict:
+    """Output record for a profile that could not be scraped."""
+    error_msg = f'Error: {username}: {str(error)}'
+    Actor.log.error(error_msg)
+    return {
+        'username': username,
+        'scrape_status': 'failed',
+        'error': error_msg,
+        'scraped_at': datetime.utcnow().isoformat()
+    }
+
+
 async def main():
     """Apify actor entry point."""
     async with Actor:
         actor_input = await Actor.get_input() or {}
-        profiles = actor_input.get('profiles', [])
-        cookies = actor_input.get('cookies')
+        cookie_sets = [c for c in [actor_input.get('cookies')] + (actor_input.get('cookieSets') or []) if c]
+        max_concurrency = max(1, int(actor_input.get('maxConcurrency') or DEFAULT_MAX_CONCURRENCY))
         
-        if not cookies:
-            await Actor.fail('LinkedIn cookies required.')
+        if not cookie_sets:
+            await Actor.fail(status_message='LinkedIn cookies required.')
             return
         
-        if not profiles:
-            await Actor.fail('No profiles specified.')
+        if not has_profile_source(actor_input):
+            await Actor.fail(status_message='No profiles specified.')
             return
         
-        Actor.log.info(f'Starting scrape for {len(profiles)} profile(s)')
+        try:
+            plan = FieldPlan(actor_input.get('fields'))
+        except ValueError as e:
+            await Actor.fail(status_message=str(e))
+            return
         
-        for idx, profile_input in enumerate(profiles, 1):
-            if isinstance(profile_input, str):
-                username = profile_input
-            elif isinstance(profile_input, dict):
-                username = profile_input.get('username') or profile_input.get('url', '').split('/in/')[-1].strip('/')
-            else:
-                Actor.log.warning(f'Invalid profile at index {idx}')
-                continue
-            
-            username = username.strip().rstrip('/')
-            if '/in/' in username:
-                username = username.split('/in/')[-1].strip('/')
+        Actor.log.info(
+            f'Starting scrape with {len(cookie_sets)} account(s), '
+            f'concurrency {max_concurrency} per account'
+        )
+        if not plan.complete:
+            Actor.log.info(
+                f"Fields: {', '.join(sorted(plan.fields))} "
+                f"({plan.requests} request(s) per profile instead of 3)"
+            )
+        
+        # Each in-flight profile blocks one thread on network I/O; the spare
+        # threads keep storage writes, which also run in this executor, from
+        # queueing behind the scrapes
+        total_concurrency = max_concurrency * len(cookie_sets)
+        asyncio.get_running_loop().set_default_executor(
+            ThreadPoolExecutor(max_workers=total_concurrency + STORAGE_THREADS)
+        )
+        
+        # A migrated or restarted run finds its progress in its own key-value store
+        request_queue = await open_profiles_request_queue(actor_input)
+        checkpoint = await open_checkpoint(request_queue)
+        
+        # Profiles are read as the workers need them, so a list of millions
+        # never sits in memory; the queue only evens out bursts of the source
+        queue: asyncio.Queue = asyncio.Queue(maxsize=total_concurrency * 4)
+        duplicates = DuplicateFilter(dedupe_capacity(actor_input))
+        
+        async def produce():
+            already_done = 0
+            try:
+                async for idx, username, request in iter_profiles(
+                    actor_input, request_queue, resume_requests=checkpoint.interrupted_requests, duplicates=duplicates
+                ):
+                    if request is None and checkpoint.is_completed(idx):
+                        already_done += 1
+                        continue
+                    checkpoint.start(idx, request)
+                    if username is None:
+                        Actor.log.warning(f'Invalid profile at index {idx}')
+                        await checkpoint.complete([idx])
+                        continue
+                    progress.total += 1
+                    await queue.put((idx, username))
+            finally:
+                progress.input_done = True
+                for _ in range(total_concurrency):
+                    await queue.put(None)
             
-            Actor.log.info(f'[{idx}/{len(profiles)}] Scraping: {username}')
+            if already_done or checkpoint.interrupted:
+                Actor.log.info(
+                    f'Resuming: {already_done} profile(s) already done, {progress.total} left '
+                    f'({checkpoint.interrupted} interrupted profile(s) are scraped again)'
+                )
+            if duplicates.skipped:
+                metrics.count('profiles_duplicate', duplicates.skipped)
+                Actor.log.info(
+                    f'Skipped {duplicates.skipped} duplicate profile(s) '
+                    f'(filter sized for {duplicates.capacity} profiles)'
+                )
+        
+        async def worker():
+            while True:
+                item = await queue.get()
+                if item is None:
+                    return
+                idx, username = item
+                
+                Actor.log.info(f'[{idx}] Scraping: {username}')
+                started = time.monotonic()
+                # An account that is blocked or logged out hands the profile to the next one;
+                # the profile only counts as failed once no account is left to try
+                record = None
+                last_error = None
+                for attempt in range(1, pool.size + 1):
+                    with metrics.timer('account_wait'):
+                        account = await pool.acquire()
+                    if account is None:
+                        last_error = 'No usable LinkedIn account left'
+                        break
+                    
+                    attempt_started = time.monotonic()
+                    try:
+                        record = await scrape_profile(username, account.transport, parser_pool, plan)
+                    except Exception as e:
+                        problem = await pool.release(account, time.monotonic() - attempt_started, e)
+                        last_error = e
+                        if problem is None:
+                            break
+                        Actor.log.warning(f'{account.name}: {problem} ({username}: {e})')
+                        if attempt < pool.size:
+                            metrics.count('profiles_reassigned')
+                    else:
+                        await pool.release(account, time.monotonic() - attempt_started)
+                        Actor.log.info(f'✓ Success: {username} ({account.name})')
+                        break
+                if record is None:
+                    record = failure_record(username, last_error)
+                metrics.observe('profile_total', time.monotonic() - started)
+                metrics.count(f"profiles_{record['scrape_status']}")
+                progress.advance()
+                
+                if companies is not None and record['scrape_status'] == 'success':
+                    for company in companies.resolve(record.get('experience') or []):
+                        await companies_writer.add(company)
+                
+                if detector is not None and record['scrape_status'] == 'success':
+                    change = detector.check(username, record)
+                    if change is None:
+                        Actor.log.info(f'= Unchanged: {username}')
+                        await records_stored([(idx, username)])
+                        continue
+                    record.update(change)
+                await writer.add(record, key=(idx, username))
+        
+        try:
+            cache = await open_response_cache(actor_input)
+        except ValueError as e:
+            await Actor.fail(status_message=str(e))
+            return
+        
+        detector = await open_change_detector(actor_input)
+        companies = await open_company_index(actor_input)
+        metrics = open_metrics(actor_input)
+        progress = Progress()
+        
+        parser_count = parser_workers(actor_input)
+        parser_pool = open_parser_pool(parser_count)
+        if parser_pool is not None:
+            Actor.log.info(f'Parsing in {parser_count} worker process(es)')
+        
+        # Load tests point the run at a local stand-in server instead of LinkedIn
+        base_url = os.environ.get('LINKEDIN_BASE_URL') or LINKEDIN_URL
+        if base_url != LINKEDIN_URL:
+            Actor.log.warning(f'Sending requests to {base_url} instead of LinkedIn')
+        
+        # Every account gets its own connections and rate limiter; up to
+        # two requests per profile are in flight at once
+        pool = AccountPool([
+            Account(
+                f'account-{number}',
+                LinkedInTransport(
+                    cookies,
+                    pool_size=max_concurrency * 2,
+                    http2=actor_input.get('http2', False),
+                    cache=cache,
+                    limiter=AdaptiveRateLimiter(
+                        rate=float(actor_input.get('requestsPerSecond') or DEFAULT_REQUESTS_PER_SECOND),
+                        max_rate=float(actor_input.get('maxRequestsPerSecond') or DEFAULT_MAX_REQUESTS_PER_SECOND),
+                    ),
+                    max_retries=int(actor_input.get('maxRetries', DEFAULT_MAX_RETRIES)),
+                    metrics=metrics,
+                    base_url=base_url,
+                ),
+                max_in_flight=max_concurrency,
+            )
+            for number, cookies in enumerate(cookie_sets, 1)
+        ])
+        
+        async def records_stored(keys):
+            # Fingerprints only count once their record is stored, like checkpoint progress
+            if detector is not None:
+                await detector.commit(username for _, username in keys)
+            await checkpoint.complete(idx for idx, _ in keys)
+        
+        exporter = await open_exporter(actor_input, on_flushed=records_stored)
+        if exporter is not None:
+            Actor.log.info(
+                f'Exporting results as {exporter.export_format.upper()} files '
+                f'{exporter.prefix}-NNNNN.{exporter.export_format} in the key-value store'
+            )
+        writer = exporter or DatasetWriter(
+            batch_size=int(actor_input.get('outputBatchSize') or DEFAULT_BATCH_SIZE),
+            flush_interval=float(actor_input.get('outputFlushIntervalSeconds') or DEFAULT_FLUSH_INTERVAL_SECONDS),
+            on_flushed=records_stored,
+        )
+        companies_writer = None
+        if companies is not None and companies.normalized:
+            companies_writer = DatasetWriter(
+                batch_size=int(actor_input.get('outputBatchSize') or DEFAULT_BATCH_SIZE),
+                flush_interval=float(actor_input.get('outputFlushIntervalSeconds') or DEFAULT_FLUSH_INTERVAL_SECONDS),
+                dataset=await open_companies_dataset(actor_input),
+            )
+        
+        async def persist_state():
+            # Records first, so the checkpoint never claims a profile whose record was lost
+            await writer.flush()
+            if companies_writer is not None:
+                await companies_writer.flush()
+            await checkpoint.save()
+            if detector is not None:
+                await detector.save()
+            if companies is not None:
+                await companies.save()
+            if cache is not None:
+                await asyncio.to_thread(cache.save)
+        
+        # Saved periodically, and before the run is migrated to another server or aborted
+        for event in (Event.PERSIST_STATE, Event.MIGRATING, Event.ABORTING):
+            Actor.on(event, persist_state)
+        writer.start()
+        if companies_writer is not None:
+            companies_writer.start()
+        
+        progress_interval = float(actor_input.get('progressIntervalSeconds') or 0)
+        reporter = asyncio.create_task(progress.report(progress_interval)) if progress_interval > 0 else None
+        producer = None
+        
+        try:
+            producer = asyncio.create_task(produce())
+            await asyncio.gather(*(worker() for _ in range(total_concurrency)))
+            # Re-raises a failure to read the input once the profiles read so far are done
+            await producer
             
-            try:
-                scraper = LinkedInProfileScraper(username, cookies)
-                profile_data = scraper.get_profile()
-                profile_data['scraped_at'] = datetime.utcnow().isoformat()
-                profile_data['scrape_status'] = 'success'
-                await Actor.push_data(profile_data)
-                Actor.log.info(f'✓ Success: {username}')
-            except Exception as e:
-                error_msg = f'Error: {username}: {str(e)}'
-                Actor.log.error(error_msg)
-                await Actor.push_data({
-                    'username': username,
-                    'scrape_status': 'failed',
-                    'error': error_msg,
-                    'scraped_at': datetime.utcnow().isoformat()
-                })
+            account_stats = pool.stats()
+            for stats in account_stats:
+                Actor.log.info(
+                    f"{stats['account']} [{stats['status']}]: {stats['succeeded']} ok, "
+                    f"{stats['failed']} failed, {stats['throttled']} throttled, "
+                    f"{stats['avg_profile_seconds']}s/profile | "
+                    f"{stats['requests']} requests ({stats['protocol']}), "
+                    f"{stats['new_connections']} new / {stats['reused_connections']} reused connections, "
+                    f"{stats['throttles']} throttled responses, {stats['retries']} retries, "
+                    f"final rate {stats['requests_per_second']} requests/s"
+                )
+        finally:
+            if reporter is not None:
+                reporter.cancel()
+            if producer is not None:
+                producer.cancel()
+            await writer.close()
+            if companies_writer is not None:
+                await companies_writer.close()
+            await checkpoint.save()
+            pool.close()
+            if parser_pool is not None:
+                parser_pool.shutdown(cancel_futures=True)
+            if cache is not None:
+                await asyncio.to_thread(cache.close)
+            if detector is not None:
+                await detector.save()
+            if companies is not None:
+                await companies.save()
         
+        stats = writer.stats()
+        Actor.log.info(
+            f"Output: {stats['records']} records in {stats['batches']} "
+            f"{'part files' if exporter is not None else 'batches'}, "
+            f"{stats['records_per_second']} records/s, "
+            f"push latency {stats['avg_flush_ms']} ms avg / {stats['max_flush_ms']} ms max"
+        )
+        if cache is not None:
+            stats = cache.stats()
+            Actor.log.info(
+                f"Response cache: {stats['hits']} hits, {stats['revalidated']} revalidated, "
+                f"{stats['misses']} misses, {stats['evicted']} evicted "
+                f"({stats['entries']} entries, {stats['size_mb']} MB)"
+            )
+        if detector is not None:
+            stats = detector.stats()
+            Actor.log.info(
+                f"Incremental: {stats['new']} new, {stats['changed']} changed, "
+                f"{stats['unchanged']} unchanged (not pushed)"
+            )
+        if companies is not None:
+            stats = companies.stats()
+            Actor.log.info(
+                f"Companies: {stats['companies']} indexed, {stats['new']} new, "
+                f"{stats['reused']} repeat mentions, {stats['written']} written to the company table"
+            )
+        if metrics.enabled:
+            summary = metrics.summary()
+            summary['output'] = writer.stats()
+            summary['accounts'] = account_stats
+            if cache is not None:
+                summary['response_cache'] = cache.stats()
+            if companies is not None:
+                summary['companies'] = companies.stats()
+            await Actor.set_value(METRICS_KEY, summary)
+            
+            timings = summary['timings_ms']
+            Actor.log.info('Timings (ms, p50 / p90 / max): ' + ', '.join(
+                f"{phase} {timings[phase]['p50']} / {timings[phase]['p90']} / {timings[phase]['max']}"
+                for phase in ('profile_total', 'profile_fetch', 'profile_parse', 'account_wait')
+                if phase in timings
+            ) + f' (full summary in the {METRICS_KEY} record)')
         Actor.log.info('Scraping completed!')
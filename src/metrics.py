@@ -0,0 +1,202 @@
+"""
+Run instrumentation
+Phase timers, counters and size histograms shared by every scraper thread of a run
+"""
+
+import asyncio
+import math
+import threading
+import time
+from contextlib import nullcontext
+from typing import Dict, Optional
+
+from apify import Actor
+
+METRICS_KEY = 'METRICS'
+
+# Histogram buckets grow by this factor, so percentiles are within about 10%
+BUCKET_FACTOR = 1.2
+# Smallest resolved value: 0.1 ms for timings, 64 bytes for sizes
+MIN_SECONDS = 0.0001
+MIN_BYTES = 64
+
+
+# ============================================================================
+# HISTOGRAM
+# ============================================================================
+
+class Histogram:
+    """Log-bucketed histogram: constant memory, approximate percentiles."""
+
+    def __init__(self, min_value: float):
+        self.min_value = min_value
+        self.buckets: Dict[int, int] = {}
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def add(self, value: float) -> None:
+        bucket = 0 if value <= self.min_value else int(math.log(value / self.min_value, BUCKET_FACTOR)) + 1
+        self.buckets[bucket] = self.buckets.get(bucket, 0) + 1
+        self.count += 1
+        self.total += value
+        self.max = max(self.max, value)
+
+    def percentile(self, fraction: float) -> float:
+        """Upper bound of the bucket holding the given fraction of values."""
+        rank = fraction * self.count
+        seen = 0
+        for bucket in sorted(self.buckets):
+            seen += self.buckets[bucket]
+            if seen >= rank:
+                return min(self.max, self.min_value * BUCKET_FACTOR ** bucket)
+        return self.max
+
+    def summary(self, scale: float = 1.0, digits: int = 1) -> Dict:
+        def scaled(value: float) -> float:
+            return round(value * scale, digits)
+
+        return {
+            'count': self.count,
+            'total': scaled(self.total),
+            'mean': scaled(self.total / self.count) if self.count else 0.0,
+            'p50': scaled(self.percentile(0.5)),
+            'p90': scaled(self.percentile(0.9)),
+            'p99': scaled(self.percentile(0.99)),
+            'max': scaled(self.max),
+        }
+
+
+# ============================================================================
+# METRICS
+# ============================================================================
+
+class _Timer:
+    __slots__ = ('metrics', 'phase', 'started')
+
+    def __init__(self, metrics: 'Metrics', phase: str):
+        self.metrics = metrics
+        self.phase = phase
+
+    def __enter__(self):
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.metrics.observe(self.phase, time.perf_counter() - self.started)
+        return False
+
+
+class Metrics:
+    """Thread-safe timings, counters and response sizes of one run."""
+
+    enabled = True
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._started = time.monotonic()
+        self.timings: Dict[str, Histogram] = {}
+        self.sizes: Dict[str, Histogram] = {}
+        self.counters: Dict[str, int] = {}
+
+    def timer(self, phase: str) -> _Timer:
+        """Context manager that records how long its block took."""
+        return _Timer(self, phase)
+
+    def observe(self, phase: str, seconds: float) -> None:
+        with self._lock:
+            histogram = self.timings.get(phase)
+            if histogram is None:
+                histogram = self.timings[phase] = Histogram(MIN_SECONDS)
+            histogram.add(seconds)
+
+    def size(self, name: str, num_bytes: int) -> None:
+        with self._lock:
+            histogram = self.sizes.get(name)
+            if histogram is None:
+                histogram = self.sizes[name] = Histogram(MIN_BYTES)
+            histogram.add(num_bytes)
+
+    def count(self, name: str, amount: int = 1) -> None:
+        with self._lock:
+            self.counters[name] = self.counters.get(name, 0) + amount
+
+    def summary(self) -> Dict:
+        """Timings in milliseconds, sizes in KiB, plus the raw counters."""
+        with self._lock:
+            return {
+                'elapsed_seconds': round(time.monotonic() - self._started, 1),
+                'timings_ms': {name: h.summary(scale=1000) for name, h in sorted(self.timings.items())},
+                'sizes_kib': {name: h.summary(scale=1 / 1024) for name, h in sorted(self.sizes.items())},
+                'counters': dict(sorted(self.counters.items())),
+            }
+
+
+class NullMetrics:
+    """Stand-in used when instrumentation is off; every call is a no-op."""
+
+    enabled = False
+    _timer = nullcontext()
+
+    def timer(self, phase: str):
+        return self._timer
+
+    def observe(self, phase: str, seconds: float) -> None:
+        pass
+
+    def size(self, name: str, num_bytes: int) -> None:
+        pass
+
+    def count(self, name: str, amount: int = 1) -> None:
+        pass
+
+    def summary(self) -> Dict:
+        return {}
+
+
+NULL_METRICS = NullMetrics()
+
+
+def open_metrics(actor_input: Dict):
+    """Collect metrics when the input turns instrumentation on."""
+    return Metrics() if actor_input.get('instrumentation') else NULL_METRICS
+
+
+# ============================================================================
+# LIVE PROGRESS
+# ============================================================================
+
+class Progress:
+    """Profiles finished so far, with throughput and the estimated time left.
+
+    While the input is still being read the total keeps growing, so it is
+    shown as a lower bound and no ETA is given.
+    """
+
+    def __init__(self, total: int = 0):
+        self.total = total
+        self.input_done = False
+        self.done = 0
+        self._started = time.monotonic()
+
+    def advance(self, amount: int = 1) -> None:
+        self.done += amount
+
+    def line(self) -> str:
+        elapsed = time.monotonic() - self._started
+        per_minute = self.done / elapsed * 60 if elapsed > 0 else 0.0
+        left = self.total - self.done
+        eta: Optional[str] = None
+        if per_minute > 0 and self.input_done:
+            eta_seconds = int(left / per_minute * 60)
+            eta = f'{eta_seconds // 3600}h{eta_seconds % 3600 // 60:02d}m{eta_seconds % 60:02d}s'
+        return (
+            f'Progress: {self.done}/{self.total}{"" if self.input_done else "+"} profiles, '
+            f'{per_minute:.1f} profiles/min, ETA {eta or "unknown"}'
+        )
+
+    async def report(self, interval: float) -> None:
+        """Log the progress line every ``interval`` seconds until cancelled."""
+        while True:
+            await asyncio.sleep(interval)
+            Actor.log.info(self.line())
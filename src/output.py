@@ -0,0 +1,259 @@
+"""
+Buffered dataset output
+Collects output records and pushes them to a dataset, or exports them as files, in batches that overlap with scraping
+"""
+
+import asyncio
+import io
+import json
+import time
+from typing import Awaitable, Callable, Dict, Hashable, List, Optional, Tuple
+
+from apify import Actor
+
+# A batch is pushed once any of these limits is reached
+DEFAULT_BATCH_SIZE = 50
+DEFAULT_BATCH_MAX_BYTES = 5 * 1024 * 1024
+DEFAULT_FLUSH_INTERVAL_SECONDS = 10.0
+
+# Part files of the key-value store export
+DEFAULT_EXPORT_PREFIX = 'results'
+DEFAULT_EXPORT_BATCH_SIZE = 5000
+DEFAULT_EXPORT_MAX_BYTES = 8 * 1024 * 1024
+# Part files are written at least this often, and before a migration
+DEFAULT_EXPORT_FLUSH_INTERVAL_SECONDS = 60.0
+EXPORT_CONTENT_TYPES = {
+    'ndjson': 'application/x-ndjson',
+    'parquet': 'application/vnd.apache.parquet',
+}
+
+
+class DatasetWriter:
+    """Buffers output records and pushes them to a dataset, the default one unless given, in batches.
+
+    A batch is pushed in the background when it reaches ``batch_size``
+    records or ``max_bytes`` of JSON, and at least every ``flush_interval``
+    seconds, so scraping never waits on the storage API. Only one push is
+    in flight at a time; when a second full batch piles up behind it,
+    ``add`` waits for the push to finish instead of buffering without
+    bound.
+
+    Records can be added with a key; ``on_flushed`` is called with the keys
+    of every batch once it is stored. A flush that finds more than one
+    batch buffered pushes it as several batches within the limits.
+    """
+
+    def __init__(
+        self,
+        batch_size: int = DEFAULT_BATCH_SIZE,
+        max_bytes: int = DEFAULT_BATCH_MAX_BYTES,
+        flush_interval: float = DEFAULT_FLUSH_INTERVAL_SECONDS,
+        on_flushed: Optional[Callable[[List[Hashable]], Awaitable[None]]] = None,
+        dataset=None,
+    ):
+        self.dataset = dataset
+        self.batch_size = max(1, batch_size)
+        self.max_bytes = max_bytes
+        self.flush_interval = flush_interval
+        self.on_flushed = on_flushed
+        # Buffered (record, size, key) entries
+        self._buffer: List[Tuple[object, int, Optional[Hashable]]] = []
+        self._buffer_bytes = 0
+        self._flush_lock = asyncio.Lock()
+        self._pending: Optional[asyncio.Task] = None
+        self._ticker: Optional[asyncio.Task] = None
+        self._stopping = asyncio.Event()
+        self._started = time.monotonic()
+        self.records = 0
+        self.batches = 0
+        self.flush_seconds = 0.0
+        self.max_flush_seconds = 0.0
+
+    def start(self) -> None:
+        """Start the periodic flush."""
+        self._started = time.monotonic()
+        self._ticker = asyncio.create_task(self._tick())
+
+    async def _tick(self) -> None:
+        while True:
+            try:
+                await asyncio.wait_for(self._stopping.wait(), self.flush_interval)
+                return
+            except asyncio.TimeoutError:
+                await self._background_flush()
+
+    async def _background_flush(self) -> None:
+        try:
+            await self.flush()
+        except Exception as e:
+            Actor.log.warning(f'Dataset push failed, retrying with the next batch: {e}')
+
+    async def add(self, record: Dict, key: Optional[Hashable] = None) -> None:
+        """Buffer one record and push the batch in the background once it is full."""
+        await self._append(record, len(json.dumps(record, ensure_ascii=False, default=str)), key)
+
+    async def _append(self, item, size: int, key: Optional[Hashable]) -> None:
+        self._buffer.append((item, size, key))
+        self._buffer_bytes += size
+        if len(self._buffer) < self.batch_size and self._buffer_bytes < self.max_bytes:
+            return
+
+        if self._pending is not None and not self._pending.done():
+            # The previous batch is still being pushed
+            if len(self._buffer) < 2 * self.batch_size and self._buffer_bytes < 2 * self.max_bytes:
+                return
+            await self._pending
+        self._pending = asyncio.create_task(self._background_flush())
+
+    async def flush(self) -> None:
+        """Push everything buffered so far and wait for it to be stored."""
+        async with self._flush_lock:
+            # Records added while this flush pushes are left to the next one
+            remaining = len(self._buffer)
+            while remaining:
+                count = min(self._batch_length(), remaining)
+                entries = self._buffer[:count]
+                del self._buffer[:count]
+                remaining -= count
+                batch_bytes = sum(size for _, size, _ in entries)
+                self._buffer_bytes -= batch_bytes
+
+                started = time.monotonic()
+                try:
+                    await self._push([item for item, _, _ in entries])
+                except BaseException:
+                    # Keep the records for the next attempt, also when cancelled
+                    self._buffer[:0] = entries
+                    self._buffer_bytes += batch_bytes
+                    raise
+                elapsed = time.monotonic() - started
+
+                self.records += count
+                self.batches += 1
+                self.flush_seconds += elapsed
+                self.max_flush_seconds = max(self.max_flush_seconds, elapsed)
+                if self.on_flushed is not None:
+                    await self.on_flushed([key for _, _, key in entries if key is not None])
+
+    def _batch_length(self) -> int:
+        """Number of buffered records that make up the next batch."""
+        count = total = 0
+        for _, size, _ in self._buffer:
+            if count and (count >= self.batch_size or total + size > self.max_bytes):
+                break
+            count += 1
+            total += size
+        return count
+
+    async def _push(self, batch: List) -> None:
+        if self.dataset is None:
+            await Actor.push_data(batch)
+        else:
+            await self.dataset.push_data(batch)
+
+    async def close(self) -> None:
+        """Stop the periodic flush and push whatever is left."""
+        if self._ticker is not None:
+            # Cancelling the ticker mid-push would lose the batch it is pushing
+            self._stopping.set()
+            await self._ticker
+            self._ticker = None
+        if self._pending is not None:
+            await self._pending
+        await self.flush()
+
+    def stats(self) -> Dict:
+        """Throughput and push latency for the end-of-run report."""
+        elapsed = time.monotonic() - self._started
+        return {
+            'records': self.records,
+            'batches': self.batches,
+            'avg_flush_ms': round(self.flush_seconds / self.batches * 1000, 1) if self.batches else 0.0,
+            'max_flush_ms': round(self.max_flush_seconds * 1000, 1),
+            'records_per_second': round(self.records / elapsed, 2) if elapsed > 0 else 0.0,
+        }
+
+
+class KeyValueStoreExporter(DatasetWriter):
+    """Writes records as numbered NDJSON or Parquet part files to a key-value store.
+
+    For bulk consumers: a part file of thousands of records is one storage
+    write, instead of a dataset push that stores every record as an item.
+    NDJSON lines are serialized once, when the record is added. Part
+    numbers continue after the files already in the store, so a resumed
+    run does not overwrite what it exported before.
+    """
+
+    def __init__(
+        self,
+        store,
+        export_format: str = 'ndjson',
+        prefix: str = DEFAULT_EXPORT_PREFIX,
+        batch_size: int = DEFAULT_EXPORT_BATCH_SIZE,
+        max_bytes: int = DEFAULT_EXPORT_MAX_BYTES,
+        flush_interval: float = DEFAULT_EXPORT_FLUSH_INTERVAL_SECONDS,
+        **kwargs,
+    ):
+        super().__init__(batch_size=batch_size, max_bytes=max_bytes, flush_interval=flush_interval, **kwargs)
+        if export_format not in EXPORT_CONTENT_TYPES:
+            raise ValueError(f'Unknown export format: {export_format}')
+        self.store = store
+        self.export_format = export_format
+        self.prefix = prefix
+        self.parts = 0
+
+    async def open(self) -> None:
+        """Continue the part numbering of files exported before a restart."""
+        start = f'{self.prefix}-'
+        async for record in self.store.iterate_keys(exclusive_start_key=start):
+            if not record.key.startswith(start):
+                break
+            number = record.key[len(start):].split('.', 1)[0]
+            if number.isdigit():
+                self.parts = max(self.parts, int(number))
+
+    async def add(self, record: Dict, key: Optional[Hashable] = None) -> None:
+        """Buffer one record and write a part file in the background once it is full."""
+        line = json.dumps(record, ensure_ascii=False, default=str)
+        await self._append(line if self.export_format == 'ndjson' else record, len(line), key)
+
+    async def _push(self, batch: List) -> None:
+        data = await asyncio.to_thread(self._encode, batch)
+        key = f'{self.prefix}-{self.parts + 1:05d}.{self.export_format}'
+        await self.store.set_value(key, data, content_type=EXPORT_CONTENT_TYPES[self.export_format])
+        self.parts += 1
+
+    def _encode(self, batch: List) -> bytes:
+        if self.export_format == 'ndjson':
+            return ('\n'.join(batch) + '\n').encode('utf-8')
+        # Imported on first use: pyarrow adds about 30 MB to every process
+        # that loads it, parser workers included
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+
+        # Columns from every record of the part: from_pylist only looks at the
+        # first, which drops the fields of success records after a failure
+        columns = dict.fromkeys(key for record in batch for key in record)
+        table = pa.Table.from_pydict({column: [record.get(column) for record in batch] for column in columns})
+        sink = io.BytesIO()
+        pq.write_table(table, sink, compression='zstd')
+        return sink.getvalue()
+
+
+async def open_exporter(actor_input: Dict, **kwargs) -> Optional[KeyValueStoreExporter]:
+    """Build the key-value store exporter when the input asks for file export, or return None."""
+    export_format = actor_input.get('exportFormat') or 'dataset'
+    if export_format == 'dataset':
+        return None
+
+    store_name = actor_input.get('exportStoreName')
+    store = await Actor.open_key_value_store(name=store_name) if store_name else await Actor.open_key_value_store()
+    exporter = KeyValueStoreExporter(
+        store,
+        export_format=export_format,
+        prefix=actor_input.get('exportPrefix') or DEFAULT_EXPORT_PREFIX,
+        batch_size=int(actor_input.get('exportPartSize') or DEFAULT_EXPORT_BATCH_SIZE),
+        **kwargs,
+    )
+    await exporter.open()
+    return exporter
@@ -0,0 +1,40 @@
+"""
+Parser process pool
+Runs the CPU-bound profile parsing in worker processes, outside the GIL of the fetching process
+"""
+
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, Optional
+
+# The Apify platform gives an actor one CPU core per 4 GB of memory
+MEMORY_MB_PER_CPU = 4096
+
+
+def allocated_cpus() -> int:
+    """CPU cores this process may use, honouring affinity and the platform's memory-based share."""
+    try:
+        cpus = len(os.sched_getaffinity(0))
+    except AttributeError:
+        cpus = os.cpu_count() or 1
+    memory_mb = os.environ.get('ACTOR_MEMORY_MBYTES')
+    if memory_mb and memory_mb.isdigit():
+        cpus = min(cpus, max(1, int(memory_mb) // MEMORY_MB_PER_CPU))
+    return cpus
+
+
+def parser_workers(actor_input: Dict) -> int:
+    """Worker processes requested by the input: 0 parses in-process, -1 uses every allocated core."""
+    workers = int(actor_input.get('parserWorkers') or 0)
+    if workers < 0:
+        return allocated_cpus()
+    return min(workers, allocated_cpus())
+
+
+def open_parser_pool(workers: int) -> Optional[ProcessPoolExecutor]:
+    """Start the parser processes, or return None to parse in the scraping threads."""
+    if workers <= 0:
+        return None
+    # Forking a process that already runs fetch threads is unsafe; spawn starts clean workers
+    return ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context('spawn'))
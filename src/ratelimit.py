@@ -0,0 +1,140 @@
+"""
+Adaptive rate control
+Token bucket per cookie identity whose rate follows AIMD on LinkedIn throttling signals
+"""
+
+import random
+import threading
+import time
+from email.utils import parsedate_to_datetime
+from typing import Dict, Optional
+from urllib.parse import urlparse
+
+# Responses LinkedIn sends when it wants us to slow down
+THROTTLE_STATUSES = (429, 999)
+# Transient server errors worth retrying without slowing down
+RETRY_STATUSES = (500, 502, 503, 504)
+# Paths a throttled or logged-out session gets redirected to
+LOGIN_PATHS = ('/login', '/authwall', '/checkpoint', '/uas/login')
+
+DEFAULT_REQUESTS_PER_SECOND = 2.0
+DEFAULT_MAX_REQUESTS_PER_SECOND = 20.0
+DEFAULT_MAX_RETRIES = 4
+
+# Backoff between retries: full jitter over base * 2^attempt, capped
+BACKOFF_BASE = 1.0
+BACKOFF_CAP = 60.0
+
+
+class ThrottledError(Exception):
+    """LinkedIn kept throttling a request after every retry."""
+
+    def __init__(self, message: str, reason: str, retry_after: Optional[float] = None):
+        super().__init__(message)
+        self.reason = reason
+        self.retry_after = retry_after
+
+
+def throttle_reason(response) -> Optional[str]:
+    """Name the throttling signal in a response, or None for a normal response."""
+    if response.status_code in THROTTLE_STATUSES:
+        return 'rate_limited'
+    if response.status_code in (301, 302, 303, 307) or response.history:
+        # Whole path segments, so a profile like /in/loginov-ivan is not a login page
+        path = urlparse(response.headers.get('location') or str(response.url)).path.rstrip('/')
+        if any(path == login or path.startswith(login + '/') for login in LOGIN_PATHS):
+            return 'login_redirect'
+    return None
+
+
+def parse_retry_after(value: Optional[str]) -> Optional[float]:
+    """Seconds to wait from a Retry-After header given as seconds or an HTTP date."""
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+def backoff_delay(attempt: int) -> float:
+    """Jittered exponential backoff before retry number ``attempt`` (0-based)."""
+    return random.uniform(0, min(BACKOFF_CAP, BACKOFF_BASE * 2 ** attempt))
+
+
+class AdaptiveRateLimiter:
+    """Token bucket whose refill rate adapts to throttling (AIMD).
+
+    Every successful request raises the rate by a fixed step, every
+    throttling signal halves it. A Retry-After pause stops all requests of
+    the identity until it has passed.
+    """
+
+    def __init__(
+        self,
+        rate: float = DEFAULT_REQUESTS_PER_SECOND,
+        max_rate: float = DEFAULT_MAX_REQUESTS_PER_SECOND,
+        min_rate: float = 0.1,
+        increase: float = 0.1,
+        decrease: float = 0.5,
+        burst: float = 3.0,
+    ):
+        self.rate = min(rate, max_rate)
+        self.max_rate = max_rate
+        self.min_rate = min_rate
+        self.increase = increase
+        self.decrease = decrease
+        self.burst = burst
+        self._lock = threading.Lock()
+        self._tokens = 1.0
+        self._updated = time.monotonic()
+        self._paused_until = 0.0
+        self._last_decrease = 0.0
+        self.throttles = 0
+        self.retries = 0
+
+    def acquire(self) -> None:
+        """Block until the bucket allows another request."""
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                if now < self._paused_until:
+                    wait = self._paused_until - now
+                else:
+                    self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+                    self._updated = now
+                    if self._tokens >= 1:
+                        self._tokens -= 1
+                        return
+                    wait = (1 - self._tokens) / self.rate
+            time.sleep(wait)
+
+    def on_success(self) -> None:
+        with self._lock:
+            self.rate = min(self.max_rate, self.rate + self.increase)
+
+    def on_throttle(self, retry_after: Optional[float] = None) -> None:
+        with self._lock:
+            now = time.monotonic()
+            self.throttles += 1
+            # A burst of in-flight requests throttled together counts as one signal
+            if now - self._last_decrease > 1 / self.rate:
+                self.rate = max(self.min_rate, self.rate * self.decrease)
+                self._last_decrease = now
+            if retry_after:
+                self._paused_until = max(self._paused_until, now + retry_after)
+
+    def on_retry(self) -> None:
+        with self._lock:
+            self.retries += 1
+
+    def stats(self) -> Dict:
+        return {
+            'requests_per_second': round(self.rate, 2),
+            'throttles': self.throttles,
+            'retries': self.retries,
+        }
@@ -0,0 +1,265 @@
+"""
+Profile input sources
+Streams usernames from the inline list, a dataset, a key-value store file or a request queue
+"""
+
+import asyncio
+import codecs
+import csv
+import hashlib
+import json
+import math
+import re
+from typing import AsyncIterator, Dict, Iterable, Optional, Tuple
+from urllib.parse import unquote, urlparse
+
+from apify import Actor
+
+# Usernames the duplicate filter is sized for, and its false positive rate; a false positive skips a profile
+DEFAULT_DEDUPE_CAPACITY = 5_000_000
+# Smallest filter, used for short inline lists
+MIN_DEDUPE_CAPACITY = 1000
+DEDUPE_ERROR_RATE = 0.0001
+
+# Columns of a CSV file that may hold the profile, compared without case, spaces, dashes or underscores
+CSV_PROFILE_COLUMNS = ('username', 'url', 'profileurl', 'linkedinurl', 'profile')
+RE_HEADER_NOISE = re.compile(r'[\s_-]+')
+
+# Apify storage IDs are 17 alphanumeric characters; anything else is a storage name
+RE_STORAGE_ID = re.compile(r'^[a-zA-Z0-9]{17}$')
+
+# Lines read from a local file per thread hop
+LOCAL_READ_HINT = 1 << 16
+
+
+def normalize_profile_input(profile_input) -> Optional[str]:
+    """Turn a profile URL, username or input object into a bare username."""
+    if isinstance(profile_input, str):
+        username = profile_input
+    elif isinstance(profile_input, dict):
+        username = profile_input.get('username') or profile_input.get('url', '').split('/in/')[-1].strip('/')
+    else:
+        return None
+
+    username = username.strip().rstrip('/')
+    if '/in/' in username:
+        username = username.split('/in/')[-1].strip('/')
+    return username or None
+
+
+# ============================================================================
+# DUPLICATE FILTER
+# ============================================================================
+
+class BloomFilter:
+    """Fixed-size set membership test: no false negatives, rare false positives."""
+
+    def __init__(self, capacity: int, error_rate: float = DEDUPE_ERROR_RATE):
+        bits = max(8, int(-capacity * math.log(error_rate) / math.log(2) ** 2))
+        self.size = bits
+        self.hashes = max(1, round(bits / capacity * math.log(2)))
+        self.bits = bytearray((bits + 7) // 8)
+
+    def _positions(self, value: str) -> Iterable[int]:
+        # Double hashing: two 64-bit halves of one digest give every position
+        digest = hashlib.blake2b(value.encode('utf-8'), digest_size=16).digest()
+        first, second = int.from_bytes(digest[:8], 'little'), int.from_bytes(digest[8:], 'little') | 1
+        return ((first + i * second) % self.size for i in range(self.hashes))
+
+    def add(self, value: str) -> bool:
+        """Add a value; return False if it was (probably) seen before."""
+        new = False
+        for position in self._positions(value):
+            byte, mask = position >> 3, 1 << (position & 7)
+            if not self.bits[byte] & mask:
+                self.bits[byte] |= mask
+                new = True
+        return new
+
+
+class DuplicateFilter:
+    """Drops usernames seen before in the input, and counts and logs every one dropped.
+
+    A Bloom filter false positive drops a profile that was never seen, so
+    each skip is logged at debug level to make it traceable.
+    """
+
+    def __init__(self, capacity: int = DEFAULT_DEDUPE_CAPACITY):
+        self.capacity = capacity
+        self._seen = BloomFilter(capacity)
+        self.skipped = 0
+
+    def is_new(self, idx: int, username: str) -> bool:
+        if self._seen.add(username):
+            return True
+        self.skipped += 1
+        Actor.log.debug(f'[{idx}] Skipping duplicate: {username}')
+        return False
+
+
+def dedupe_capacity(actor_input: Dict) -> int:
+    """Size of the duplicate filter: as asked for, or as long as an inline list that is the only source."""
+    if actor_input.get('dedupeCapacity'):
+        return int(actor_input['dedupeCapacity'])
+    streamed = (
+        actor_input.get('profilesDataset')
+        or actor_input.get('profilesRequestQueue')
+        or (actor_input.get('profilesKeyValueStore') and actor_input.get('profilesKey'))
+    )
+    if streamed:
+        return DEFAULT_DEDUPE_CAPACITY
+    return max(MIN_DEDUPE_CAPACITY, len(actor_input.get('profiles') or ()))
+
+
+# ============================================================================
+# SOURCES
+# ============================================================================
+
+def _storage_ref(value: str) -> Dict[str, str]:
+    """Open a storage by ID when the value looks like one, otherwise by name."""
+    return {'id': value} if RE_STORAGE_ID.match(value) else {'name': value}
+
+
+async def _iter_list(values: Iterable) -> AsyncIterator:
+    for value in values:
+        yield value
+
+
+async def _iter_dataset(value: str) -> AsyncIterator:
+    dataset = await Actor.open_dataset(**_storage_ref(value))
+    async for item in dataset.iterate_items():
+        yield item
+
+
+async def _iter_requests(queue, resume: Iterable) -> AsyncIterator:
+    """Requests a previous run of this one read but did not finish, then the unread ones."""
+    for request in resume:
+        yield request
+    while True:
+        request = await queue.fetch_next_request()
+        if request is None:
+            return
+        yield request
+
+
+async def _iter_record_lines(value: str, key: str) -> AsyncIterator[str]:
+    """Lines of a key-value store record, read a chunk at a time."""
+    store = await Actor.open_key_value_store(**_storage_ref(value))
+    url = await store.get_public_url(key)
+
+    if url.startswith('file://'):
+        # Local storage keeps records as plain files
+        with open(unquote(urlparse(url).path), encoding='utf-8-sig') as f:
+            while True:
+                lines = await asyncio.to_thread(f.readlines, LOCAL_READ_HINT)
+                if not lines:
+                    return
+                for line in lines:
+                    yield line
+        return
+
+    client = Actor.apify_client.key_value_store(store.id)
+    async with client.stream_record(key) as record:
+        if record is None:
+            raise ValueError(f'Record {key!r} not found in key-value store {value!r}')
+        decoder = codecs.getincrementaldecoder('utf-8-sig')()
+        pending = ''
+        async for chunk in record['value'].aiter_bytes():
+            lines = (pending + decoder.decode(chunk)).split('\n')
+            pending = lines.pop()
+            for line in lines:
+                yield line
+        pending += decoder.decode(b'', final=True)
+        if pending:
+            yield pending
+
+
+async def _iter_record(value: str, key: str) -> AsyncIterator:
+    """Profiles in a CSV, NDJSON or plain text record, one per line."""
+    lines = _iter_record_lines(value, key)
+    if key.lower().endswith('.csv'):
+        column = 0
+        first = True
+        async for line in lines:
+            if not line.strip():
+                continue
+            row = next(csv.reader([line]))
+            if first:
+                first = False
+                header = [RE_HEADER_NOISE.sub('', cell.lower()) for cell in row]
+                matches = [name for name in CSV_PROFILE_COLUMNS if name in header]
+                if matches:
+                    column = header.index(matches[0])
+                    continue
+            if column < len(row):
+                yield row[column]
+        return
+
+    async for line in lines:
+        line = line.strip()
+        if not line:
+            continue
+        yield json.loads(line) if line[0] in '{"' else line
+
+
+async def open_profiles_request_queue(actor_input: Dict):
+    """The request queue named by the input, or None."""
+    if not actor_input.get('profilesRequestQueue'):
+        return None
+    return await Actor.open_request_queue(**_storage_ref(actor_input['profilesRequestQueue']))
+
+
+async def iter_profiles(
+    actor_input: Dict,
+    request_queue=None,
+    resume_requests: Iterable = (),
+    duplicates: Optional[DuplicateFilter] = None,
+) -> AsyncIterator[Tuple[int, Optional[str], Optional[object]]]:
+    """Yield ``(index, username, request)`` for every input profile, duplicates dropped.
+
+    The inline list comes first, then the dataset and the key-value store
+    record; their indexes are the same every time the input is read. The
+    request queue comes last, starting with ``resume_requests``, those a
+    previous run of this one read but did not finish. ``request``
+    is the queue request of the profile, to be marked handled once its
+    record is stored, and None for the other sources. The username is None
+    for an entry that is not a profile. Duplicates are tracked with a Bloom
+    filter, so memory stays flat however long the input is; pass
+    ``duplicates`` to read how many were dropped.
+    """
+    if duplicates is None:
+        duplicates = DuplicateFilter(dedupe_capacity(actor_input))
+
+    sources = [_iter_list(actor_input.get('profiles') or [])]
+    if actor_input.get('profilesDataset'):
+        sources.append(_iter_dataset(actor_input['profilesDataset']))
+    if actor_input.get('profilesKeyValueStore') and actor_input.get('profilesKey'):
+        sources.append(_iter_record(actor_input['profilesKeyValueStore'], actor_input['profilesKey']))
+
+    idx = 0
+    for source in sources:
+        async for profile_input in source:
+            idx += 1
+            username = normalize_profile_input(profile_input)
+            if username is None or duplicates.is_new(idx, username):
+                yield idx, username, None
+
+    if request_queue is None:
+        return
+    async for request in _iter_requests(request_queue, resume_requests):
+        idx += 1
+        username = normalize_profile_input(request.user_data.get('username') or request.url)
+        if username is None or duplicates.is_new(idx, username):
+            yield idx, username, request
+        else:
+            await request_queue.mark_request_as_handled(request)
+
+
+def has_profile_source(actor_input: Dict) -> bool:
+    """Whether the input names any profiles to scrape."""
+    return bool(
+        actor_input.get('profiles')
+        or actor_input.get('profilesDataset')
+        or actor_input.get('profilesRequestQueue')
+        or (actor_input.get('profilesKeyValueStore') and actor_input.get('profilesKey'))
+    )
@@ -0,0 +1,237 @@
+"""
+Shared HTTP transport
+One pooled, keep-alive connection set per LinkedIn cookie identity
+"""
+
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Optional
+
+import httpx
+import requests
+from requests import Response, Session
+from requests.adapters import HTTPAdapter
+
+from src.metrics import NULL_METRICS
+from src.ratelimit import (
+    DEFAULT_MAX_RETRIES,
+    RETRY_STATUSES,
+    AdaptiveRateLimiter,
+    ThrottledError,
+    backoff_delay,
+    parse_retry_after,
+    throttle_reason,
+)
+
+# Network failures worth retrying
+TRANSPORT_ERRORS = (requests.ConnectionError, requests.Timeout, httpx.TransportError)
+
+# Keep-alive connections kept open to www.linkedin.com
+DEFAULT_POOL_SIZE = 10
+
+# Origin every request goes to; a local stand-in server can take its place for load tests
+LINKEDIN_URL = 'https://www.linkedin.com'
+
+
+# ============================================================================
+# UTILITY FUNCTIONS
+# ============================================================================
+
+def format_cookies(cookie_string: str) -> Dict[str, str]:
+    """Convert cookie string to dictionary format."""
+    cookies = {}
+    for item in cookie_string.split(';'):
+        item = item.strip()
+        if '=' in item:
+            key, value = item.split('=', 1)
+            cookies[key.strip()] = value.strip()
+    return cookies
+
+
+def generate_chrome_user_agent() -> str:
+    """Generate a realistic Chrome user agent."""
+    return "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36"
+
+
+# ============================================================================
+# TRANSPORT
+# ============================================================================
+
+class LinkedInTransport:
+    """Run-scoped HTTP client shared by every scraper using one cookie identity."""
+
+    def __init__(
+        self,
+        cookies: str,
+        pool_size: int = DEFAULT_POOL_SIZE,
+        http2: bool = False,
+        cache=None,
+        limiter: Optional[AdaptiveRateLimiter] = None,
+        max_retries: int = DEFAULT_MAX_RETRIES,
+        metrics=NULL_METRICS,
+        base_url: str = LINKEDIN_URL,
+    ):
+        """Parse cookies, build headers and open the connection pool once."""
+        self.base_url = base_url.rstrip('/')
+        self.cookies = format_cookies(cookies)
+        self.cache = cache
+        self.metrics = metrics
+        self.limiter = limiter or AdaptiveRateLimiter()
+        self.max_retries = max_retries
+
+        user_agent = generate_chrome_user_agent()
+        self.headers = {
+            'accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,image/webp,*/*;q=0.8',
+            'accept-language': 'en-US,en;q=0.9',
+            'user-agent': user_agent,
+            'referer': f'{self.base_url}/',
+        }
+
+        self.voyager_headers = {
+            'accept': 'application/vnd.linkedin.normalized+json+2.1',
+            'accept-language': 'en-US,en;q=0.9',
+            'csrf-token': self.cookies.get('JSESSIONID', '').strip('"'),
+            'user-agent': user_agent,
+            'x-li-lang': 'en_US',
+            'x-restli-protocol-version': '2.0.0',
+        }
+
+        # Runs the independent requests of a profile in parallel
+        self.executor = ThreadPoolExecutor(max_workers=pool_size, thread_name_prefix='linkedin-fetch')
+
+        self._lock = threading.Lock()
+        self._requests = 0
+        self._new_connections = 0
+
+        # HTTP/2 multiplexes every request over a single connection
+        self.http2 = bool(http2)
+        if self.http2:
+            self.client = httpx.Client(
+                http2=True,
+                verify=False,
+                cookies=self.cookies,
+                follow_redirects=True,
+                timeout=None,
+                limits=httpx.Limits(max_connections=pool_size, max_keepalive_connections=pool_size),
+            )
+        else:
+            self.client = Session()
+            self.client.verify = False
+            self.client.cookies.update(self.cookies)
+            self._adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size, pool_block=True)
+            self.client.mount('https://', self._adapter)
+            self.client.mount('http://', self._adapter)
+
+    def _trace(self, event_name: str, info: Dict) -> None:
+        """Count new connections opened by httpx."""
+        if event_name == 'connection.connect_tcp.complete':
+            with self._lock:
+                self._new_connections += 1
+
+    def get(self, url: str, voyager: bool = False, extra_headers: Optional[Dict[str, str]] = None) -> Response:
+        """GET a LinkedIn URL with the page or Voyager API headers."""
+        headers = self.voyager_headers if voyager else self.headers
+        if extra_headers:
+            headers = {**headers, **extra_headers}
+        with self._lock:
+            self._requests += 1
+        if self.http2:
+            return self.client.get(url, headers=headers, extensions={'trace': self._trace})
+        return self.client.get(url, headers=headers)
+
+    def request(self, url: str, voyager: bool = False, extra_headers: Optional[Dict[str, str]] = None) -> Response:
+        """GET at the identity's current rate, retrying throttled and transient failures."""
+        for attempt in range(self.max_retries + 1):
+            with self.metrics.timer('rate_limit_wait'):
+                self.limiter.acquire()
+            try:
+                with self.metrics.timer('http_request'):
+                    response = self.get(url, voyager=voyager, extra_headers=extra_headers)
+            except TRANSPORT_ERRORS:
+                self.metrics.count('http_transport_errors')
+                if attempt == self.max_retries:
+                    raise
+            else:
+                self.metrics.count(f'http_status_{response.status_code}')
+                reason = throttle_reason(response)
+                if reason is None and response.status_code not in RETRY_STATUSES:
+                    self.limiter.on_success()
+                    return response
+
+                retry_after = parse_retry_after(response.headers.get('retry-after'))
+                if reason is not None:
+                    self.limiter.on_throttle(retry_after)
+                if attempt == self.max_retries:
+                    if reason is None:
+                        # raise_for_status() reports the server error
+                        return response
+                    raise ThrottledError(
+                        f'LinkedIn throttled the request ({reason}, HTTP {response.status_code}) '
+                        f'after {attempt + 1} attempts',
+                        reason,
+                        retry_after,
+                    )
+
+            self.limiter.on_retry()
+            self.metrics.count('http_retries')
+            time.sleep(backoff_delay(attempt))
+
+    def fetch_text(
+        self,
+        url: str,
+        voyager: bool = False,
+        cache_key: Optional[str] = None,
+        endpoint: str = 'request',
+    ) -> str:
+        """GET a URL and return its body, going through the response cache when one is set.
+
+        ``endpoint`` names the response in the run metrics.
+        """
+        with self.metrics.timer(f'fetch_{endpoint}'):
+            text = self._fetch_text(url, voyager, cache_key, endpoint)
+        self.metrics.size(endpoint, len(text))
+        return text
+
+    def _fetch_text(self, url: str, voyager: bool, cache_key: Optional[str], endpoint: str) -> str:
+        entry = self.cache.lookup(cache_key) if self.cache is not None and cache_key else None
+        if entry is not None and entry['fresh']:
+            self.metrics.count(f'cache_hits_{endpoint}')
+            return entry['text']
+
+        response = self.request(url, voyager=voyager, extra_headers=self.cache.validators(entry) if entry else None)
+        if entry is not None:
+            if response.status_code == 304:
+                self.metrics.count(f'cache_revalidated_{endpoint}')
+                self.cache.mark_revalidated(cache_key)
+                return entry['text']
+            self.cache.mark_missed()
+        response.raise_for_status()
+
+        text = response.text
+        if self.cache is not None and cache_key:
+            self.cache.store(
+                cache_key, text,
+                etag=response.headers.get('etag'),
+                last_modified=response.headers.get('last-modified'),
+            )
+        return text
+
+    def stats(self) -> Dict:
+        """Connection reuse counters for the run."""
+        new_connections = self._new_connections
+        if not self.http2:
+            pools = self._adapter.poolmanager.pools
+            new_connections = sum(pools[key].num_connections for key in pools.keys())
+        return {
+            'protocol': 'HTTP/2' if self.http2 else 'HTTP/1.1',
+            'requests': self._requests,
+            'new_connections': new_connections,
+            'reused_connections': max(0, self._requests - new_connections),
+            **self.limiter.stats(),
+        }
+
+    def close(self) -> None:
+        """Stop the fetch threads and close all pooled connections."""
+        self.executor.shutdown(wait=False)
+        self.client.close()